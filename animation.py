@@ -0,0 +1,68 @@
+import time
+from PySide6.QtCore import QObject, QTimer, Qt, QEasingCurve
+
+EASINGS = ("Linear", "InOutQuad", "OutQuad", "OutCubic", "InOutCubic", "OutExpo")
+
+
+class PieAnimator(QObject):
+    # Moves the done fraction toward its target on a frame clock, a new target bends the running animation instead of queueing one
+    def __init__(self, apply, duration_ms=250, easing="OutCubic", fps=60, parent=None):
+        super().__init__(parent)
+        self.apply = apply
+        self.duration = duration_ms / 1000
+        self.curve = QEasingCurve(getattr(QEasingCurve.Type, easing))
+
+        self.value = None
+        self.start_value = 0.0
+        self.target = 0.0
+        self.start = 0.0
+        self.frames = 0
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(round(1000 / fps))
+        self.timer.timeout.connect(self.tick)
+
+    def animate_to(self, target):
+        if self.value is None or self.duration <= 0:
+            # Nothing on screen yet (or animations off), show the target right away
+            self.target = self.value = target
+            self.apply(target)
+            return
+
+        if target == self.target and self.timer.isActive():
+            return
+        if target == self.value:
+            # Same place, only the colors or the theme changed
+            self.target = target
+            self.timer.stop()
+            self.apply(target)
+            return
+
+        # Start from wherever the pie is now, the new target gets the full duration
+        self.start_value = self.value
+        self.target = target
+        self.start = time.perf_counter()
+        if not self.timer.isActive():
+            self.timer.start()
+        self.tick()
+
+    def tick(self):
+        progress = min(1.0, (time.perf_counter() - self.start) / self.duration)
+        self.value = self.start_value + (self.target - self.start_value) * self.curve.valueForProgress(progress)
+        if progress >= 1.0:
+            self.value = self.target
+            self.timer.stop()
+        self.frames += 1
+        self.apply(self.value)
+
+    def stop(self):
+        self.timer.stop()
+
+    def reset(self):
+        # Something else was drawn meanwhile, the next target is shown without a sweep
+        self.timer.stop()
+        self.value = None
+
+    def running(self):
+        return self.timer.isActive()
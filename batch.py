@@ -0,0 +1,175 @@
+import os
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from matplotlib.colors import is_color_like
+from chart import DEFAULT_COLOR1, DEFAULT_COLOR2, render_pie
+from theme import THEMES, theme_index
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+# One figure per worker process, reused for every record it renders
+worker_chart = None
+
+
+def parse_bool(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def parse_mode(value):
+    # A theme name or index like the slider in the settings window, true and false still pick dark and light
+    names = [theme["name"] for theme in THEMES]
+    if isinstance(value, str) and value.strip().lower() in names:
+        return names.index(value.strip().lower())
+    try:
+        return theme_index(value)
+    except (TypeError, ValueError):
+        return 1 if parse_bool(value, True) else 0
+
+
+def read_records(stream, fmt):
+    # Yields one record per row or line without reading the whole input, JSONL lines are parsed by to_job
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def to_job(record):
+    # Everything that can be wrong with a record is caught here, before it costs a worker a render
+    if isinstance(record, str):
+        record = json.loads(record)
+
+    # The id becomes the file name, it must not reach outside the output directory
+    job_id = str(record["id"])
+    if job_id in ("", ".", "..") or any(sep and sep in job_id for sep in (os.sep, os.altsep, "\0")):
+        raise ValueError(f"id {job_id!r} is not a plain file name")
+
+    total = float(record["total"])
+    current = float(record["current"])
+    if not math.isfinite(total) or not 0 < total or not 0 <= current <= total:
+        raise ValueError(f"current {current} is not within total {total}")
+
+    color1 = record.get("color1") or DEFAULT_COLOR1
+    color2 = record.get("color2") or DEFAULT_COLOR2
+    for color in (color1, color2):
+        if not is_color_like(color):
+            raise ValueError(f"{color!r} is not a color")
+
+    return (
+        job_id,
+        current,
+        total - current,
+        color1,
+        color2,
+        parse_mode(record.get("mode")),
+        parse_bool(record.get("show_percentage"), True),
+    )
+
+
+def render_jobs(jobs, out_dir, image_format, size):
+    # Returns how many were rendered and (record number, error) for the ones that failed, one bad record never costs the chunk
+    global worker_chart
+    rendered = 0
+    failed = []
+    for number, (job_id, done, tbd, color1, color2, mode, checkbox) in jobs:
+        path = os.path.join(out_dir, f"{job_id}.{image_format}")
+        try:
+            worker_chart = render_pie(path, done, tbd, color1, color2, mode, checkbox, size, worker_chart)
+        except (OSError, ValueError) as e:
+            # The figure may be half updated, the next record starts from a fresh one
+            worker_chart = None
+            failed.append((number, repr(e)))
+            continue
+        rendered += 1
+    return rendered, failed
+
+
+def chunks(records, size, errors):
+    chunk = []
+    for number, record in enumerate(records, 1):
+        try:
+            chunk.append((number, to_job(record)))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(number)
+            print(f"record {number}: skipped ({e!r})", file=sys.stderr)
+            continue
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def collect(futures, errors):
+    rendered = 0
+    for future in futures:
+        count, failed = future.result()
+        rendered += count
+        for number, error in failed:
+            errors.append(number)
+            print(f"record {number}: failed ({error})", file=sys.stderr)
+    return rendered
+
+
+def run(stream, fmt, out_dir, image_format, size, workers, chunk_size):
+    errors = []
+    rendered = 0
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded number of chunks in flight so the input is streamed, not slurped
+        pending = set()
+        for chunk in chunks(read_records(stream, fmt), chunk_size, errors):
+            if len(pending) >= in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                rendered += collect(done, errors)
+            pending.add(executor.submit(render_jobs, chunk, out_dir, image_format, size))
+
+        rendered += collect(pending, errors)
+
+    elapsed = time.perf_counter() - start
+    return rendered, len(errors), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render progress pies from a CSV or JSONL stream of (id, total, current, color1, color2, mode, show_percentage) records")
+    parser.add_argument("input", nargs="?", default="-", help="input file, '-' reads stdin (default)")
+    parser.add_argument("-o", "--out", default=".", help="output directory")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="defaults to the input file extension, jsonl for stdin")
+    parser.add_argument("--image-format", choices=("png", "svg"), default="png")
+    parser.add_argument("--size", default="640x480", help="image size in pixels, WIDTHxHEIGHT")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="records sent to a worker at once")
+    args = parser.parse_args()
+
+    fmt = args.input_format
+    if fmt is None:
+        fmt = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.input == "-":
+        rendered, failed, elapsed = run(sys.stdin, fmt, args.out, args.image_format, (width, height), args.workers, args.chunk_size)
+    else:
+        with open(args.input, newline="") as stream:
+            rendered, failed, elapsed = run(stream, fmt, args.out, args.image_format, (width, height), args.workers, args.chunk_size)
+
+    print(f"{rendered} images in {elapsed:.2f} s ({rendered / elapsed if elapsed else 0:.1f} images/sec), {failed} skipped", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,984 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import matplotlib.pyplot as plt
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QObject, QEvent, QTimer, QEventLoop
+from mainwindow import MainWindow
+from dashboard import DashboardWindow
+from theme import main_stylesheet
+import fonts
+import resources
+from instrument import recorder
+from measure import rss_kb
+from history import ProgressHistory
+from sources import DirectorySource, LogSource, SharedCountersSource, StreamSource
+import subprocess
+import sharedcounters
+import multiprocessing
+
+
+def per_call_ms(action, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        action()
+    return (time.perf_counter() - start) / count * 1000
+
+
+def full_rebuild(window, done, tbd):
+    # The original update_chart: clear the figure and build a new pie every time
+    figure = window.canvas.figure
+    figure.clear()
+    ax = figure.add_subplot(111)
+    edgecolor = "white" if window.mode else "black"
+    figure.set_facecolor('#333333' if window.mode else '#E0E0E0')
+    if window.checkbox:
+        ax.pie([done, tbd], startangle=90, counterclock=False, colors=[window.color1, window.color2], autopct='%1.1f%%', wedgeprops={"linewidth": 1, "edgecolor": edgecolor})
+    else:
+        ax.pie([done, tbd], startangle=90, counterclock=False, colors=[window.color1, window.color2], wedgeprops={"linewidth": 1, "edgecolor": edgecolor})
+    ax.axis('equal')
+    window.canvas.draw()
+
+
+def incremental(window, done, tbd):
+    window.canvas.update_pie(done, tbd, window.color1, window.color2, window.mode, window.checkbox)
+
+
+def measure(update, window, count):
+    app = QApplication.instance()
+    start = time.perf_counter()
+    for i in range(count):
+        done = i % 100
+        update(window, done, 100 - done)
+        app.processEvents()
+    return (time.perf_counter() - start) / count * 1000
+
+
+def bench_update_chart(app, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    # The full rebuild throws away the persistent chart's axes, detach it first
+    window.canvas.mpl_disconnect(window.canvas.chart.draw_cid)
+    before = measure(full_rebuild, window, count)
+    window.close()
+
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    after = measure(incremental, window, count)
+
+    window.close()
+
+    window = MainWindow(renderer="native")
+    window.show()
+    app.processEvents()
+
+    native = measure(incremental, window, count)
+
+    print(f"update_chart x{count}")
+    print(f"  full rebuild: {before:.2f} ms/update")
+    print(f"  incremental:  {after:.2f} ms/update ({before / after:.1f}x)")
+    print(f"  native:       {native:.2f} ms/update ({before / native:.1f}x)")
+    window.close()
+
+
+def bench_input_storm(app, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    # Every edit hands its text to the scheduler, as the QLineEdit signals do
+    start = time.perf_counter()
+    for i in range(count):
+        window.scheduler.submit_text("1000", str(i % 1000))
+        app.processEvents()
+    while window.scheduler.timer.isActive():
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    print(f"input storm x{count}")
+    print(f"  total time: {elapsed * 1000:.0f} ms")
+    for name, value in window.scheduler.stats().items():
+        print(f"  {name + ':':11} {value}")
+    window.close()
+
+
+def bench_render_cache(app, count):
+    for renderer in ("matplotlib", "native"):
+        window = MainWindow(renderer=renderer, cache_mb=32)
+        window.show()
+        app.processEvents()
+
+        # Flip between a handful of totals and both modes, like a user toggling back and forth
+        start = time.perf_counter()
+        for i in range(count):
+            window.mode = i // 5 % 2
+            window.draw_chart(4 + i % 5, 1)
+            app.processEvents()
+        elapsed = (time.perf_counter() - start) / count * 1000
+
+        print(f"render cache x{count} ({renderer})")
+        print(f"  cached:     {elapsed:.2f} ms/update")
+        for name, value in window.canvas.cache.stats().items():
+            print(f"  {name + ':':11} {value}")
+        window.close()
+
+
+def bench_set_mode(app, count):
+    window = MainWindow(renderer="native")
+    window.show()
+    app.processEvents()
+
+    def run(apply):
+        start = time.perf_counter()
+        for i in range(count):
+            apply(i)
+            app.processEvents()
+        return (time.perf_counter() - start) / count * 1000
+
+    # What set_mode used to do on every call, even without a change
+    always = run(lambda i: window.setStyleSheet(main_stylesheet(1)))
+    same = run(lambda i: window.set_mode(1))
+    switch = run(lambda i: window.set_mode(i % 2))
+
+    print(f"set_mode x{count}")
+    print(f"  restyle every call: {always:.2f} ms")
+    print(f"  same theme:         {same:.2f} ms")
+    print(f"  theme switch:       {switch:.2f} ms")
+    for name, seconds in resources.timings.items():
+        print(f"  {name + ':':19} {seconds * 1000:.2f} ms, once per process")
+    window.close()
+
+
+def check_open_settings(app, count):
+    window = MainWindow(renderer="native")
+    window.show()
+    app.processEvents()
+
+    # open_settings runs the dialog modally, close it as soon as its event loop starts
+    times = []
+    for _ in range(count):
+        QTimer.singleShot(0, lambda: window.settings_window.reject())
+        start = time.perf_counter()
+        window.open_settings()
+        times.append((time.perf_counter() - start) * 1000)
+
+    print(f"open_settings x{count}")
+    print(f"  first open:         {times[0]:.2f} ms")
+    print(f"  later opens:        {sum(times[1:]) / max(1, count - 1):.2f} ms")
+    print(f"  font registrations: {fonts.registrations}")
+    window.close()
+    return fonts.registrations == 1
+
+
+def bench_threaded(app, count):
+    # Drive updates from a 5 ms timer inside a real event loop and look at how late the ticks get
+    for renderer in ("matplotlib", "native"):
+        for threaded in (False, True):
+            window = MainWindow(renderer=renderer, threaded=threaded)
+            window.show()
+            app.processEvents()
+
+            ticks = []
+            loop = QEventLoop()
+            timer = QTimer()
+            timer.setInterval(5)
+
+            def tick():
+                ticks.append(time.perf_counter())
+                window.draw_chart(100, len(ticks) % 100)
+                if len(ticks) >= count:
+                    loop.quit()
+
+            timer.timeout.connect(tick)
+            timer.start()
+            loop.exec()
+            timer.stop()
+
+            gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+            name = "threaded" if threaded else "GUI thread"
+            print(f"input tick gaps x{count} ({renderer}, {name})")
+            print(f"  p50 {gaps[len(gaps) // 2]:.1f} ms, p95 {gaps[int(len(gaps) * 0.95)]:.1f} ms, max {gaps[-1]:.1f} ms")
+            window.close()
+
+
+def bench_dashboard(app, ticks):
+    for count in (10, 100, 1000):
+        rss = rss_kb()
+        window = DashboardWindow()
+        for i in range(count):
+            window.chart.set_progress(f"job {i}", 100, i % 100)
+        window.show()
+        app.processEvents()
+        memory = rss_kb() - rss
+
+        # Every tick moves up to 50 trackers, the dashboard should answer with a single paint
+        changed = min(count, 50)
+        paints = window.chart.paints
+        start = time.perf_counter()
+        for tick in range(ticks):
+            for i in range(changed):
+                window.chart.set_progress(f"job {(tick * changed + i) % count}", 100, (tick + i) % 100)
+            app.processEvents()
+        elapsed = (time.perf_counter() - start) / ticks * 1000
+
+        print(f"dashboard with {count} trackers, {changed} changed per tick")
+        print(f"  {elapsed:.2f} ms/tick, {(window.chart.paints - paints) / ticks:.1f} paints/tick, {memory} kB RSS")
+        window.close()
+
+
+def bench_instrumentation(app, count):
+    window = MainWindow(renderer="native")
+    window.show()
+    app.processEvents()
+
+    def run():
+        start = time.perf_counter()
+        for i in range(count):
+            window.input2_edit.setText(str(i % 4))
+            window.update_chart()
+            app.processEvents()
+        return (time.perf_counter() - start) / count * 1000
+
+    # Recording is opt-in, a disabled span should cost next to nothing
+    off = run()
+    recorder.enabled = True
+    on = run()
+    recorder.enabled = False
+
+    print(f"instrumentation x{count} (native)")
+    print(f"  recording off: {off:.3f} ms/update")
+    print(f"  recording on:  {on:.3f} ms/update")
+    recorder.report(sys.stdout)
+    recorder.clear()
+    window.close()
+
+
+def bench_history(count):
+    # The cost of an update must not depend on how much history is kept
+    for capacity in (256, 4096, 65536):
+        history = ProgressHistory(capacity)
+        start = time.perf_counter()
+        for i in range(count):
+            history.add(count, i, now=i * 0.1)
+            history.eta(now=i * 0.1)
+        elapsed = (time.perf_counter() - start) / count * 1e6
+
+        print(f"history x{count} (capacity {capacity})")
+        print(f"  {elapsed:.2f} us/update, rate {history.rate:.2f}/s, eta {history.eta(now=(count - 1) * 0.1):.1f} s")
+
+
+def timed_poll(source):
+    start = time.perf_counter()
+    state = source.poll()
+    return (time.perf_counter() - start) * 1000, state
+
+
+def bench_sources(files):
+    with tempfile.TemporaryDirectory() as path:
+        for i in range(files):
+            open(os.path.join(path, f"{i}.out"), "w").close()
+
+        source = DirectorySource(path, "*.out")
+        full, state = timed_poll(source)
+        time.sleep(2.1)
+        unchanged, _ = timed_poll(source)
+        open(os.path.join(path, "new.out"), "w").close()
+        changed, _ = timed_poll(source)
+
+        print(f"directory source with {files} files")
+        print(f"  first listing: {full:.2f} ms ({state['current']} files)")
+        print(f"  unchanged:     {unchanged:.3f} ms")
+        print(f"  one new file:  {changed:.2f} ms")
+
+        # The log tail should only pay for what was appended since the last poll
+        log = os.path.join(path, "job.log")
+        with open(log, "w") as f:
+            for i in range(files * 10):
+                f.write(f"step {i}/{files * 10} loss 0.{i}\n")
+        source = LogSource(log, r"step (?P<current>\d+)/(?P<total>\d+)")
+        full, state = timed_poll(source)
+        with open(log, "a") as f:
+            f.write(f"step {files * 10}/{files * 10} done\n")
+        appended, state = timed_poll(source)
+        unchanged, _ = timed_poll(source)
+
+        print(f"log source with {files * 10} lines ({os.path.getsize(log) // 1024} kB)")
+        print(f"  first read:    {full:.2f} ms")
+        print(f"  one new line:  {appended:.3f} ms -> {state['current']:g}/{state['total']:g}")
+        print(f"  unchanged:     {unchanged:.3f} ms")
+
+
+class WakeupCounter(QObject):
+    # Timer ticks and queued calls from worker threads wake the GUI thread, window repaints are the redraws
+    def __init__(self):
+        super().__init__()
+        self.wakeups = 0
+        self.redraws = 0
+
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.Timer, QEvent.MetaCall):
+            self.wakeups += 1
+        elif event.type() == QEvent.UpdateRequest:
+            self.redraws += 1
+        return False
+
+
+def bench_idle(app, seconds):
+    # A job that moves one step a second, watched through a directory that does not change, extrapolated to an hour
+    counter = WakeupCounter()
+    with tempfile.TemporaryDirectory() as path:
+        for name, show in (("visible", "show"), ("minimized", "showMinimized"), ("hidden", "hide")):
+            window = MainWindow(renderer="native", source=DirectorySource(path))
+            window.show()
+            window.history.add(1000, 0, now=time.monotonic() - 10)
+            window.apply_remote_state({"total": 1000, "current": 10})
+            getattr(window, show)()
+            app.processEvents()
+            if show != "show" and app.focusWidget():
+                # The offscreen platform leaves a minimized window active, a desktop takes the focus and the cursor stops blinking
+                app.focusWidget().clearFocus()
+
+            loop = QEventLoop()
+            QTimer.singleShot(1000, loop.quit)
+            loop.exec()
+
+            app.installEventFilter(counter)
+            counter.wakeups = counter.redraws = 0
+            cpu = time.process_time()
+            loop = QEventLoop()
+            QTimer.singleShot(seconds * 1000, loop.quit)
+            loop.exec()
+            cpu = time.process_time() - cpu
+            app.removeEventFilter(counter)
+
+            print(f"idle for {seconds} s ({name})")
+            print(f"  {counter.wakeups * 60 / seconds:.0f} wakeups/min, {counter.redraws * 60 / seconds:.0f} redraws/min, {cpu * 3600 / seconds:.2f} s CPU per hour")
+            window.source_watcher.stop()
+            window.close()
+
+    # The same values pushed again and again should not redraw anything
+    window = MainWindow(renderer="native")
+    window.show()
+    app.processEvents()
+    app.installEventFilter(counter)
+    counter.redraws = 0
+    for _ in range(100):
+        window.apply_remote_state({"total": 4, "current": 1})
+        app.processEvents()
+    app.removeEventFilter(counter)
+    print("unchanged updates x100")
+    print(f"  {counter.redraws} redraws")
+    window.close()
+
+
+def bench_segments(count):
+    # Moving a pool of wedges with one vectorized layout against building a new pie with ax.pie, on an offscreen Agg figure
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from chart import PieChart, pie_layout, pie_fractions
+    from nativechart import NativeRasterizer
+    from segments import PALETTE
+
+    figure = Figure(figsize=(6, 4))
+    canvas = FigureCanvasAgg(figure)
+    chart = PieChart(figure, blit=False)
+    rebuilt = Figure(figsize=(6, 4))
+    rebuilt_canvas = FigureCanvasAgg(rebuilt)
+    ax = rebuilt.add_subplot(111)
+    rasterize = NativeRasterizer()
+
+    print(f"segments x{count}       layout  update  ax.pie   update+draw  ax.pie+draw  native")
+    for n in (2, 4, 8, 16, 32, 48):
+        values = [1 + i % 5 for i in range(n)]
+        colors = [PALETTE[i % len(PALETTE)] for i in range(n)]
+
+        def rebuild():
+            ax.clear()
+            ax.pie(values, startangle=90, counterclock=False, colors=colors, autopct='%1.1f%%', wedgeprops={"linewidth": 1, "edgecolor": "white"})
+            ax.axis('equal')
+
+        layout = per_call_ms(lambda: pie_layout(values), count * 10)
+        update = per_call_ms(lambda: chart.update_segments(values, colors, 1, True), count)
+        pie = per_call_ms(rebuild, count)
+        update_draw = per_call_ms(lambda: (chart.update_segments(values, colors, 1, True), canvas.draw()), count // 4)
+        pie_draw = per_call_ms(lambda: (rebuild(), rebuilt_canvas.draw()), count // 4)
+        native = per_call_ms(lambda: rasterize(pie_fractions(*values), tuple(colors), 1, True, 600, 400, 1.0), count)
+        print(f"  {n:2} segments:  {layout:8.3f} {update:7.2f} {pie:7.2f} {update_draw:13.2f} {pie_draw:12.2f} {native:7.2f} ms")
+
+
+# Prints tqdm refreshes as fast as Python can format them, about 60 bytes each
+GENERATOR = """
+import sys
+count = int(sys.argv[1]) * 1024 * 1024 // 60
+out = sys.stdout.buffer
+for start in range(0, count, 10000):
+    out.write(b"".join(b"\\r%3d%%|#####     | %d/%d [00:01<00:02, 30.00it/s]" % (i * 100 // count, i + 1, count) for i in range(start, min(count, start + 10000))))
+out.write(b"\\n")
+"""
+
+
+def bench_stream(app, megabytes):
+    # A job that floods the pipe, the GUI keeps a 5 ms timer going and only ever sees the newest value
+    generator = subprocess.Popen([sys.executable, "-c", GENERATOR, str(megabytes)], stdout=subprocess.PIPE)
+    source = StreamSource(generator.stdout, min_interval=33)
+    window = MainWindow(renderer="native", source=source)
+    window.show()
+    app.processEvents()
+    rss = rss_kb()
+
+    ticks = []
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setInterval(5)
+
+    def tick():
+        ticks.append(time.perf_counter())
+        if source.eof:
+            loop.quit()
+
+    start = time.perf_counter()
+    timer.timeout.connect(tick)
+    timer.start()
+    loop.exec()
+    timer.stop()
+    seconds = time.perf_counter() - start
+
+    # One more poll picks up the last value
+    loop = QEventLoop()
+    QTimer.singleShot(200, loop.quit)
+    loop.exec()
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    print(f"stdin stream, {source.bytes / 1024 / 1024:.0f} MB of tqdm output")
+    print(f"  {source.bytes / 1024 / 1024 / seconds:.1f} MB/s, {window.source_watcher.changes} values drawn, last {window.input2_edit.text()}/{window.input1_edit.text()}")
+    print(f"  GUI tick gaps p50 {gaps[len(gaps) // 2]:.1f} ms, p95 {gaps[int(len(gaps) * 0.95)]:.1f} ms, max {gaps[-1]:.1f} ms")
+    print(f"  RSS growth: {rss_kb() - rss} kB")
+    generator.wait()
+    window.source_watcher.stop()
+    window.close()
+
+
+# Pollers in a process of their own, each on one keep-alive connection sending back the last ETag
+LOAD_CLIENT = """
+import sys, json, time, threading, http.client
+port, clients, seconds = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+results = []
+
+def poll():
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    etag, codes, times = None, {}, []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        connection.request("GET", "/chart.png", headers={"If-None-Match": etag} if etag else {})
+        response = connection.getresponse()
+        response.read()
+        times.append(time.perf_counter() - start)
+        codes[response.status] = codes.get(response.status, 0) + 1
+        etag = response.getheader("ETag")
+        time.sleep(0.05)
+    results.append((codes, times))
+
+threads = [threading.Thread(target=poll) for _ in range(clients)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+codes = {}
+for result, _ in results:
+    for code, count in result.items():
+        codes[code] = codes.get(code, 0) + count
+times = sorted(t for _, result in results for t in result)
+print(json.dumps({"codes": codes, "p50": times[len(times) // 2], "p99": times[int(len(times) * 0.99)]}))
+"""
+
+
+def bench_http(app, clients, seconds):
+    # Hundreds of pollers against the embedded server while the value changes every 50 ticks
+    import json
+    import urllib.request
+
+    window = MainWindow(renderer="native", http=0)
+    window.show()
+    app.processEvents()
+    server = window.chart_server
+    # Niced like the server, on a single core the pollers stand in for other machines rather than take the window's CPU
+    client = subprocess.Popen([sys.executable, "-c", LOAD_CLIENT, str(server.port), str(clients), str(seconds)], stdout=subprocess.PIPE, preexec_fn=lambda: os.nice(10))
+
+    ticks = []
+    states = set()
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setInterval(5)
+
+    def tick():
+        ticks.append(time.perf_counter())
+        if len(ticks) % 50 == 0:
+            window.apply_remote_state({"total": 100, "current": len(ticks) // 50 % 101})
+            states.add(len(ticks) // 50 % 101)
+        if client.poll() is not None:
+            loop.quit()
+
+    timer.timeout.connect(tick)
+    timer.start()
+    loop.exec()
+    timer.stop()
+
+    result = json.loads(client.stdout.read())
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/stats.json") as response:
+        stats = json.load(response)
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    requests = sum(result["codes"].values())
+    print(f"http, {clients} pollers for {seconds} s")
+    print(f"  {requests / seconds:.0f} requests/s, {result['codes'].get('200', 0)} x 200, {result['codes'].get('304', 0)} x 304")
+    print(f"  latency p50 {result['p50'] * 1000:.1f} ms, p99 {result['p99'] * 1000:.1f} ms")
+    print(f"  {stats['renders']} renders for {len(states)} states")
+    print(f"  GUI tick gaps p50 {gaps[len(gaps) // 2]:.1f} ms, p95 {gaps[int(len(gaps) * 0.95)]:.1f} ms, max {gaps[-1]:.1f} ms")
+    server.stop()
+    window.close()
+
+
+def produce(path, count, results):
+    # One writer process of the shared counter stress run, CPU time so sharing the cores with the others does not count
+    with sharedcounters.Counter(path, total=count) as counter:
+        start = time.process_time()
+        for _ in range(count):
+            counter.add()
+        results.put((time.process_time() - start) / count)
+
+
+def check_shared_counters(workers, count):
+    # Dozens of processes bump their slots while the reader samples the sum as fast as the source allows
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    with tempfile.TemporaryDirectory() as path:
+        path = os.path.join(path, "job.pie")
+        sharedcounters.create(path, slots=workers)
+        source = SharedCountersSource(path)
+        results = context.Queue()
+        processes = [context.Process(target=produce, args=(path, count, results)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        # Every sample must be a sum of whole writes: never going back, never past the totals
+        samples = []
+        bad = 0
+        last = 0
+        while any(process.is_alive() for process in processes):
+            start = time.perf_counter()
+            state = source.poll()
+            samples.append((time.perf_counter() - start) * 1000)
+            if state is not None:
+                bad += state["current"] < last or state["current"] > state.get("total", 0)
+                last = state["current"]
+            time.sleep(0.001)
+
+        costs = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        state = source.poll() or source.state()
+        source.close()
+
+    samples.sort()
+    ok = bad == 0 and state == {"current": workers * count, "total": workers * count}
+    print(f"shared counters, {workers} writer processes x{count} increments")
+    print(f"  producer:  {sum(costs) / len(costs) * 1e6:.2f} us CPU/increment")
+    print(f"  reader:    {len(samples)} samples, p50 {samples[len(samples) // 2] * 1000:.1f} us, max {samples[-1] * 1000:.1f} us")
+    print(f"  final:     {state['current']}/{state.get('total')}, {bad} inconsistent samples")
+    return ok
+
+
+# Runs the usage example from the top of sharedcounters.py as it is written there, only the path is the one given
+SNIPPET_RUNNER = """
+import sys
+import sharedcounters
+source = open(sharedcounters.__file__).read()
+start = source.index("#   from sharedcounters")
+snippet = "\\n".join(line[4:] for line in source[start:source.index("\\n#\\n", start)].splitlines())
+items = range(int(sys.argv[2]))
+work = lambda item: None
+exec(snippet.replace('"/tmp/job.pie"', repr(sys.argv[1])))
+"""
+
+
+def check_counter_snippet(workers, count):
+    # Producers started before anyone created the file have to create it once between them and share it
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "job.pie")
+        processes = [subprocess.Popen([sys.executable, "-c", SNIPPET_RUNNER, path, str(count)], cwd=here, stderr=subprocess.PIPE, text=True) for _ in range(workers)]
+        errors = [process.communicate(timeout=120)[1] for process in processes]
+        failed = [error.strip().splitlines()[-1] for process, error in zip(processes, errors) if process.returncode]
+        state = ((0, 0), 0)
+        if os.path.exists(path):
+            mapping, words = sharedcounters.open_counters(path)
+            state = sharedcounters.sample(words), words[3]
+            sharedcounters.close_counters(mapping, words)
+        leftovers = sorted(name for name in os.listdir(tmp) if name != "job.pie")
+
+    ok = not failed and state == ((workers * count, workers * count), workers) and not leftovers
+    print(f"sharedcounters usage example, {workers} producers on a missing file x{count} items")
+    print(f"  sum {state[0][0]}/{state[0][1]} from {state[1]} slots, {len(failed)} failed, {len(leftovers)} temporary files left")
+    for error in failed:
+        print(f"  {error}")
+    return ok
+
+
+def check_resize(app, steps):
+    # A resize drag, every step is a resize plus the repaint it causes, with and without the stretched preview
+    ok = True
+    for options in ({"renderer": "matplotlib"}, {"renderer": "matplotlib", "cache_mb": 32}, {"renderer": "matplotlib", "threaded": True}, {"renderer": "native"}):
+        name = ", ".join(f"{key}={value}" for key, value in options.items())
+        print(f"resize drag x{steps} ({name})")
+        # Native painting has no preview to compare against, it always draws at full quality
+        for fast_resize in (False, True) if options["renderer"] != "native" else (False,):
+            window = MainWindow(fast_resize=fast_resize, **options)
+            window.show()
+            loop = QEventLoop()
+            QTimer.singleShot(200, loop.quit)
+            loop.exec()
+
+            times = []
+            for i in range(steps):
+                start = time.perf_counter()
+                window.resize(600 + 10 * i, 400 + 8 * i)
+                app.processEvents()
+                times.append((time.perf_counter() - start) * 1000)
+
+            # Once the drag stops the chart has to be rendered for the final size, in physical pixels
+            loop = QEventLoop()
+            QTimer.singleShot(400, loop.quit)
+            loop.exec()
+            canvas = window.canvas
+            physical = (round(canvas.width() * canvas.devicePixelRatioF()), round(canvas.height() * canvas.devicePixelRatioF()))
+            if hasattr(canvas, "get_width_height"):
+                ok = ok and canvas.get_width_height(physical=True) == physical
+
+            times.sort()
+            print(f"  {'stretched preview' if fast_resize else 'full render':18} p50 {times[len(times) // 2]:.2f} ms, max {times[-1]:.2f} ms")
+            window.close()
+    return ok
+
+
+# Frame budgets of a sweep at the mini size. Native has to leave most of a 60 Hz frame free.
+# Matplotlib lays out and rasterizes both label texts on every blit and only has to keep up with the animator's 60 Hz clock.
+ANIMATION_BUDGETS_MS = {"native": 4.0, "matplotlib": 1000 / 60}
+
+
+def check_animation(app, frames):
+    # Every frame of a sweep (wedge update plus the repaint it queues) has to fit its renderer's budget at p95
+    ok = True
+    for renderer, budget_ms in ANIMATION_BUDGETS_MS.items():
+        window = MainWindow(renderer=renderer, animate_ms=250)
+        window.toggle_layout()
+        window.canvas.setFixedSize(260, 260)
+        window.show()
+        app.processEvents()
+        animator = window.animator
+
+        # Drive the frames by hand so every one of them is timed, not only the ones the timer happens to fire
+        times = []
+        for i in range(frames):
+            if i % 15 == 0:
+                window.apply_remote_state({"total": 100, "current": (i * 37) % 101})
+                app.processEvents()
+                continue
+            # The animator's own clock can fire inside processEvents, a sample is split over the frames it drew
+            animator.start -= animator.duration / 15
+            drawn = animator.frames
+            start = time.perf_counter()
+            animator.tick()
+            app.processEvents()
+            times.append((time.perf_counter() - start) * 1000 / (animator.frames - drawn))
+        animator.stop()
+        times.sort()
+        p95 = times[int(0.95 * (len(times) - 1))]
+
+        # A new target mid-sweep continues from the shown value, it must not jump or start a second clock
+        window.apply_remote_state({"total": 100, "current": 0})
+        app.processEvents()
+        animator.stop()
+        animator.value = 0.0
+        window.apply_remote_state({"total": 100, "current": 100})
+        animator.start -= animator.duration / 2
+        animator.tick()
+        shown = animator.value
+        window.apply_remote_state({"total": 100, "current": 20})
+        jump = abs(animator.value - shown)
+        animator.stop()
+
+        fits = p95 <= budget_ms and jump < 0.05
+        ok = ok and fits
+        verdict = "" if fits else " EXCEEDED"
+        print(f"animation frames x{len(times)} ({renderer}, {window.canvas.width()}x{window.canvas.height()})")
+        print(f"  median: {times[len(times) // 2]:.2f} ms, p95: {p95:.2f} ms, max: {times[-1]:.2f} ms, budget {budget_ms:.1f} ms{verdict}")
+        print(f"  retarget jump: {100 * jump:.2f} %")
+        window.close()
+    return ok
+
+
+def check_control(app, rate, seconds):
+    # loadgen.py pushes progress into a window's control socket from another process, every message has to be acknowledged
+    name = f"pie-benchmark-{os.getpid()}"
+    window = MainWindow(control=name)
+    window.show()
+    app.processEvents()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen([sys.executable, os.path.join(here, "loadgen.py"), name, "--rate", str(rate), "--duration", str(seconds)], stdout=subprocess.PIPE, text=True)
+    deadline = time.perf_counter() + seconds + 30
+    while process.poll() is None and time.perf_counter() < deadline:
+        loop = QEventLoop()
+        QTimer.singleShot(20, loop.quit)
+        loop.exec()
+    if process.poll() is None:
+        process.kill()
+    output = process.communicate()[0]
+    received = window.control_server.received
+    window.close()
+
+    ok = process.returncode == 0 and received == rate * seconds
+    print(f"control socket, {rate} messages/s for {seconds} s from loadgen.py")
+    for line in output.splitlines():
+        print(f"  {line}")
+    print(f"  received {received}, {'every message acknowledged' if ok else 'MESSAGES LOST OR NOT ACKNOWLEDGED'}")
+    return ok
+
+
+# Every line but the first two has to be turned down before it reaches a worker, the good records are still rendered
+BATCH_RECORDS = """{"id": "good1", "total": 10, "current": 4}
+{"id": "good2", "total": 3, "current": 3, "color1": "tab:blue", "mode": "light"}
+{"id": "broken", "total": 10,
+{"id": "color", "total": 10, "current": 4, "color1": "bogus"}
+{"id": "x/y", "total": 10, "current": 4}
+{"id": "../../foo", "total": 10, "current": 4}
+{"id": "..", "total": 10, "current": 4}
+[1, 2]
+{"id": "missing", "total": 10}
+{"id": "over", "total": 10, "current": 11}
+{"id": "inf", "total": Infinity, "current": 1}
+{"id": "infinf", "total": Infinity, "current": Infinity}
+{"id": "nan", "total": NaN, "current": 1}
+{"id": "text", "total": "inf", "current": "1"}
+"""
+
+
+def check_batch():
+    # batch.py in its own process, like it is run from a script
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "out", "pies")
+        process = subprocess.run([sys.executable, os.path.join(here, "batch.py"), "-o", out, "-j", "1"], input=BATCH_RECORDS, capture_output=True, text=True, timeout=300)
+        images = sorted(os.listdir(out)) if os.path.isdir(out) else []
+        escaped = sorted(name for name in os.listdir(tmp) if name != "out")
+
+    bad = BATCH_RECORDS.count("\n") - 2
+    skipped = process.stderr.count(": skipped (")
+    ok = process.returncode == 1 and images == ["good1.png", "good2.png"] and skipped == bad and not escaped
+    print(f"batch.py with 2 good and {bad} bad records")
+    print(f"  rendered {images}, {skipped} reported, {'every bad record skipped' if ok else 'BAD RECORDS NOT HANDLED'}")
+    if not ok:
+        print(process.stderr)
+    return ok
+
+
+# Pushed segments and the slices the window has to draw for them, None leaves the previous ones on screen
+SEGMENT_PUSHES = (
+    ({"segments": {"queued": 3, "running": 2, "done": 5}}, {"queued": 3, "running": 2, "done": 5}),
+    ({"segments": [1, 1, 2]}, {"queued": 1, "running": 1, "done": 2}),
+    ({"segments": [4, 6], "labels": ["failed", "done"]}, {"queued": 0, "running": 0, "done": 6, "failed": 4}),
+    ({"segments": [1, -1]}, None),
+    ({"segments": [1, 1e400]}, None),
+    ({"segments": [0, 0]}, None),
+    ({"segments": [1, True]}, None),
+    ({"segments": [1, 2], "labels": ["done"]}, None),
+    ({"segments": "done"}, None),
+)
+
+
+def check_segment_push(app):
+    # Segments pushed through a real control socket have to reach the window, the invalid ones must not
+    from PySide6.QtNetwork import QLocalSocket
+    import json
+
+    name = f"pie-segments-{os.getpid()}"
+    window = MainWindow(renderer="native", control=name)
+    window.show()
+    window.handle_settings_saved(window.color1, window.color2, True, window.mode, "queued, running, done #56CA3D")
+    app.processEvents()
+
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    socket.waitForConnected(3000)
+    ok = True
+    expected = None
+    print("segments pushed through the control socket")
+    for number, (message, pushed) in enumerate(SEGMENT_PUSHES, 1):
+        # An invalid message is not acknowledged, the id sent after it says when it has been handled
+        socket.write(json.dumps(message).encode() + b"\n" + json.dumps({"id": number}).encode() + b"\n")
+        deadline = time.perf_counter() + 5
+        received = b""
+        while f'"applied": {number}'.encode() not in received and time.perf_counter() < deadline:
+            loop = QEventLoop()
+            QTimer.singleShot(5, loop.quit)
+            loop.exec()
+            received += socket.readAll().data()
+
+        expected = pushed or expected
+        drawn = window.drawn[-1] and dict(zip(window.drawn[-1][0], window.drawn[-1][1]))
+        good = window.segment_values is not None and drawn == expected and window.drawn[0] == sum(expected.values())
+        ok = ok and good
+        print(f"  {json.dumps(message):56} -> {drawn}{'' if good else '  WRONG'}")
+
+    invalid = window.control_server.invalid
+    socket.disconnectFromServer()
+    app.processEvents()
+    window.close()
+    rejected = sum(pushed is None for _, pushed in SEGMENT_PUSHES)
+    ok = ok and invalid == rejected
+    print(f"  {invalid} of {rejected} invalid pushes turned down")
+    return ok
+
+
+def window_state(window):
+    return (window.input1_edit.text(), window.input2_edit.text(), window.theme, window.color1, window.checkbox, window.segments, window.is_mini_layout, window.drawn)
+
+
+def check_replay(app, count):
+    # A scripted session recorded through the real entry points has to take a replayed window through the same states
+    from replay import Replayer
+    from sessionlog import SessionLog, read_sessions
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.log")
+        window = MainWindow(renderer="native", max_fps=500, record=path)
+        window.show()
+        app.processEvents()
+        recorded = []
+        for i in range(count):
+            if i % 30 == 12:
+                window.toggle_layout()
+            elif i % 15 == 14:
+                window.select_mode(window.theme ^ 1)
+            elif i % 40 == 39:
+                window.handle_settings_saved("#3D8BCA", "#CA3D3D", bool(i % 3), window.theme, "")
+            elif i % 10 == 9:
+                window.apply_remote_state({"total": 100, "current": i % 101})
+            else:
+                edit = window.input2_edit if i % 2 else window.input1_edit
+                edit.setText(str(100 + i) if edit is window.input1_edit else str(i % 90))
+                edit.textEdited.emit(edit.text())
+            loop = QEventLoop()
+            QTimer.singleShot(3, loop.quit)
+            loop.exec()
+            recorded.append(window_state(window))
+        window.close()
+
+        log = SessionLog(os.path.join(tmp, "appends.log"), {})
+        write_ms = per_call_ms(lambda: log.write("edit", "1000", "500"), count)
+        log.close()
+
+        options, events = read_sessions(path)[-1]
+        replayed = MainWindow(**{name: options[name] for name in ("renderer", "max_fps")})
+        replayed.show()
+        app.processEvents()
+        replayer = Replayer(app, replayed)
+        results = []
+        replayed_states = []
+        for event in events:
+            results += replayer.play([event], realtime=False)
+            replayed_states.append(window_state(replayed))
+        ok = replayed_states == recorded
+        replayed.close()
+        size = os.path.getsize(path)
+
+    latencies = sorted(latency for _, _, latency, _ in results)
+    print(f"record and replay x{count} (native)")
+    print(f"  log: {size / count:.0f} bytes per event, {1000 * write_ms:.1f} us to append one")
+    print(f"  max speed replay: p50 {latencies[len(latencies) // 2]:.2f} ms, max {latencies[-1]:.2f} ms per event")
+    print(f"  window states after each event {'match' if ok else 'DIFFER FROM'} the recorded window")
+    return ok
+
+
+def toggle(app, window, count):
+    for _ in range(count):
+        window.toggle_layout()
+        app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def check_toggle_leak(app, count, renderer="matplotlib", max_growth_kb=20 * 1024):
+    window = MainWindow(renderer=renderer)
+    window.show()
+
+    # Warm up caches (fonts, styles, ...) before taking the baseline
+    toggle(app, window, 50)
+    fignums = plt.get_fignums()
+    rss = rss_kb()
+
+    toggle(app, window, count)
+    growth = rss_kb() - rss
+    leaked = plt.get_fignums() != fignums or growth > max_growth_kb
+
+    # Both rebuilt layouts have to show their inputs and the button that switches back
+    hidden = []
+    for _ in range(2):
+        toggle(app, window, 1)
+        button = window.main_button if window.is_mini_layout else window.mini_button
+        hidden += [widget for widget in (window.input1_edit, window.input2_edit, button) if not widget.isVisible()]
+
+    print(f"toggle_layout x{count} ({renderer})")
+    print(f"  pyplot figures: {len(fignums)} -> {len(plt.get_fignums())}")
+    print(f"  RSS growth:     {growth} kB")
+    print(f"  hidden widgets: {len(hidden)}")
+    window.close()
+    return not leaked and not hidden
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=200, help="number of update_chart calls to time")
+    parser.add_argument("--toggles", type=int, default=1000, help="number of layout toggles in the leak check")
+    parser.add_argument("--idle-seconds", type=int, default=10, help="how long each idle scenario runs before it is extrapolated to an hour")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+
+    bench_update_chart(app, args.updates)
+    bench_input_storm(app, args.updates * 10)
+    bench_render_cache(app, args.updates)
+    bench_set_mode(app, args.updates)
+    bench_threaded(app, args.updates)
+    bench_dashboard(app, args.updates)
+    bench_instrumentation(app, args.updates)
+    bench_history(args.updates * 500)
+    bench_sources(args.updates * 50)
+    bench_idle(app, args.idle_seconds)
+    bench_segments(args.updates)
+    bench_stream(app, args.updates)
+    bench_http(app, 200, 10)
+    ok = check_open_settings(app, 20)
+    ok = check_animation(app, args.updates) and ok
+    ok = check_resize(app, 40) and ok
+    ok = check_batch() and ok
+    ok = check_control(app, 2000, 2) and ok
+    ok = check_segment_push(app) and ok
+    ok = check_replay(app, args.updates) and ok
+    ok = check_shared_counters(32, args.updates * 500) and ok
+    ok = check_counter_snippet(8, args.updates * 10) and ok
+    ok = check_toggle_leak(app, args.toggles) and ok
+    ok = check_toggle_leak(app, args.toggles, renderer="native") and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPainter, QPixmap
+from chart import pie_fractions
+from scheduler import ResizeGate
+from instrument import span
+
+
+class PixmapCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entries=256):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        pixmap = self.entries.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        size = self.size_of(pixmap)
+        if size > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self.bytes -= self.size_of(self.entries.pop(key))
+        self.entries[key] = pixmap
+        self.bytes += size
+
+        # Drop the least recently shown pies until both limits hold again
+        while self.bytes > self.max_bytes or len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= self.size_of(evicted)
+            self.evictions += 1
+
+    def size_of(self, pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+
+class CachedChart(QWidget):
+    def __init__(self, rasterize, cache, fast_resize=False, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        self.rasterize = rasterize
+        self.cache = cache
+        self.state = None
+        self.pixmap = None
+        self.resize_gate = ResizeGate(self.refresh, parent=self) if fast_resize else None
+
+    def update_pie(self, done, tbd, color1, color2, mode, checkbox):
+        self.update_segments((done, tbd), (color1, color2), mode, checkbox)
+
+    def update_segments(self, values, colors, mode, checkbox):
+        # The label only shows tenths of a percent, finer fractions would just fill the cache
+        fracs = tuple(round(frac, 3) for frac in pie_fractions(*values))
+        self.state = (fracs, tuple(colors), mode, bool(checkbox))
+        self.refresh()
+
+    def refresh(self):
+        if self.state is None or self.width() <= 0 or self.height() <= 0:
+            return
+
+        key = self.state + (self.width(), self.height(), self.devicePixelRatioF())
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            with span("rasterize"):
+                pixmap = QPixmap.fromImage(self.rasterize(*key))
+            self.cache.put(key, pixmap)
+
+        self.pixmap = pixmap
+        self.update()
+
+    def resizeEvent(self, event):
+        if self.resize_gate is not None and self.resize_gate.resized():
+            # Mid-drag every size would be a cache miss, stretch the last pixmap until the size settles
+            self.update()
+            return
+        self.refresh()
+
+    def paintEvent(self, event):
+        if self.pixmap is None:
+            return
+
+        with span("paint"):
+            painter = QPainter(self)
+            painter.drawPixmap(self.rect(), self.pixmap)
+            painter.end()
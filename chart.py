@@ -0,0 +1,190 @@
+from theme import theme
+from instrument import span
+
+DEFAULT_COLOR1 = "#56CA3D"
+DEFAULT_COLOR2 = "#CA3D3D"
+
+# Pies with more than two slices only label the slices at least this wide, about the room a "12.5%" label takes
+MIN_LABEL_DEGREES = 18
+
+# Slices thinner than this are merged into one wedge of OTHER_COLOR, drawing dozens of hairlines costs a wedge each
+MIN_SLICE_DEGREES = 2
+OTHER_COLOR = "#B0B0B0"
+
+
+def facecolor(mode):
+    return theme(mode)["background"]
+
+
+def edgecolor(mode):
+    return theme(mode)["chart_edge"]
+
+
+def pie_fractions(*values):
+    total = sum(values)
+    if min(values) < 0 or total <= 0:
+        raise ValueError("Pie values must be non negative with a positive sum")
+    return tuple(value / total for value in values)
+
+
+def pie_slices(fracs, colors):
+    # What is drawn of a pie: the fractions, their colors and which of them get a label
+    if len(fracs) <= 2:
+        # Done against remaining keeps both slices and both labels, however thin
+        return tuple(fracs), tuple(colors), (True,) * len(fracs)
+
+    # Empty slices are left out, slivers are drawn as one "other" wedge instead of a wedge each
+    slices = [(frac, color) for frac, color in zip(fracs, colors) if frac > 0]
+    slivers = [frac for frac, _ in slices if 360 * frac < MIN_SLICE_DEGREES]
+    if len(slivers) > 1:
+        slices = [(frac, color) for frac, color in slices if 360 * frac >= MIN_SLICE_DEGREES] + [(sum(slivers), OTHER_COLOR)]
+
+    # A narrower slice would stack its label on top of its neighbours'
+    return tuple(frac for frac, _ in slices), tuple(color for _, color in slices), tuple(360 * frac >= MIN_LABEL_DEGREES for frac, _ in slices)
+
+
+def pie_layout(values):
+    # Fractions, wedge angles in degrees, label positions and texts for any number of slices in one pass
+    # Same geometry as ax.pie(startangle=90, counterclock=False), numpy is only imported where matplotlib already is
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    total = values.sum()
+    if values.size == 0 or (values < 0).any() or not total > 0:
+        raise ValueError("Pie values must be non negative with a positive sum")
+
+    fracs = values / total
+    theta1 = 0.25 - np.concatenate(([0.0], np.cumsum(fracs[:-1])))
+    theta2 = theta1 - fracs
+    thetam = np.pi * (theta1 + theta2)
+    labels = np.char.mod('%1.1f%%', 100 * fracs)
+    return fracs, 360 * theta2, 360 * theta1, 0.6 * np.cos(thetam), 0.6 * np.sin(thetam), labels
+
+
+class PieChart:
+    def __init__(self, figure, blit=True):
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.blit = blit
+        self.background = None
+        self.facecolor = None
+
+        # Build the axes and the artists once, later updates only move them
+        self.ax = figure.add_subplot(111)
+        self.wedges, _, autotexts = self.ax.pie([1, 1], startangle=90, counterclock=False, autopct='%1.1f%%', wedgeprops={"linewidth": 1})
+        self.ax.axis('equal')
+
+        # The labels are glyph outlines in one collection, laying out and rasterizing a Text per slice every frame was most of a redraw
+        # Each text is turned into outlines once, in points around its center, and placed at its slice's label position
+        from matplotlib.collections import PathCollection
+        from matplotlib.transforms import Affine2D
+
+        self.font = autotexts[0].get_fontproperties()
+        self.label_paths = {}
+        self.labels = PathCollection([], offsets=[(0, 0)], offset_transform=self.ax.transData, facecolors=autotexts[0].get_color(), linewidths=0, clip_on=False, zorder=autotexts[0].get_zorder())
+        self.labels.set_transform(Affine2D().scale(1 / 72) + figure.dpi_scale_trans)
+        self.ax.add_collection(self.labels, autolim=False)
+        for text in autotexts:
+            text.remove()
+
+        # Without blitting the caller draws or saves the figure itself
+        if not blit:
+            return
+
+        for artist in self.artists():
+            artist.set_animated(True)
+
+        # Grab a fresh background every time the whole figure is drawn (resize, mode change, ...)
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def artists(self):
+        return list(self.wedges) + [self.labels]
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+
+    def add_slices(self, count):
+        # More slices than ever shown before, the wedges are kept for later updates
+        from matplotlib.patches import Wedge
+
+        while len(self.wedges) < count:
+            wedge = Wedge((0, 0), 1, 0, 0, linewidth=1, clip_on=False)
+            self.ax.add_patch(wedge)
+            wedge.set_animated(self.blit)
+            self.wedges.append(wedge)
+
+    def label_path(self, text):
+        path = self.label_paths.get(text)
+        if path is None:
+            from matplotlib.textpath import TextPath
+            from matplotlib.transforms import Affine2D
+
+            # The box of the outline points is enough to center it, Path.get_extents solves every curve and costs several times more
+            path = TextPath((0, 0), text, prop=self.font)
+            points = path.vertices[path.codes != path.CLOSEPOLY]
+            x, y = (points.min(axis=0) + points.max(axis=0)) / 2
+            path = path.transformed(Affine2D().translate(-x, -y))
+            self.label_paths[text] = path
+        return path
+
+    def update(self, done, tbd, color1, color2, mode, checkbox):
+        self.update_segments((done, tbd), (color1, color2), mode, checkbox)
+
+    def update_segments(self, values, colors, mode, checkbox):
+        import numpy as np
+
+        fracs, colors, labelled = pie_slices(pie_fractions(*values), colors)
+        fracs, theta1, theta2, x, y, labels = pie_layout(fracs)
+
+        with span("pie.artists"):
+            count = len(fracs)
+            self.add_slices(count)
+            for i, wedge in enumerate(self.wedges):
+                if i >= count:
+                    wedge.set_visible(False)
+                    continue
+                wedge.set_theta1(theta1[i])
+                wedge.set_theta2(theta2[i])
+                wedge.set_facecolor(colors[i])
+                wedge.set_edgecolor(edgecolor(mode))
+                wedge.set_visible(True)
+
+            shown = [i for i in range(count) if checkbox and labelled[i]]
+            self.labels.set_paths([self.label_path(labels[i]) for i in shown])
+            self.labels.set_offsets(np.column_stack((x[shown], y[shown])))
+
+        if not self.blit:
+            self.figure.set_facecolor(facecolor(mode))
+        elif facecolor(mode) != self.facecolor or self.background is None:
+            # Background changed, the full draw captures it again and paints the artists
+            self.facecolor = facecolor(mode)
+            self.figure.set_facecolor(self.facecolor)
+            with span("canvas.draw"):
+                self.canvas.draw()
+        else:
+            with span("blit"):
+                self.canvas.restore_region(self.background)
+                self.draw_artists()
+                # The artists never leave the axes, only that part of the widget is repainted
+                self.canvas.blit(self.ax.bbox)
+
+
+def render_pie(path, done, tbd, color1=DEFAULT_COLOR1, color2=DEFAULT_COLOR2, mode=1, checkbox=True, size=(640, 480), chart=None):
+    # Qt-free rendering to a PNG/SVG file, pass the returned chart back in to reuse its figure
+    if chart is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        chart = PieChart(figure, blit=False)
+
+    chart.figure.set_size_inches(size[0] / chart.figure.dpi, size[1] / chart.figure.dpi)
+    chart.update(done, tbd, color1, color2, mode, checkbox)
+    chart.figure.savefig(path, facecolor=chart.figure.get_facecolor())
+    return chart
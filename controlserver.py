@@ -0,0 +1,136 @@
+import json
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtNetwork import QLocalServer
+from segments import read_segments
+
+FIELDS = ("total", "current", "color1", "color2", "mode", "show_percentage", "segments")
+
+# A line longer than this is not a control message, drop it instead of buffering forever
+MAX_LINE = 64 * 1024
+
+
+class ControlServer(QObject):
+    state_received = Signal(dict)
+    trackers_received = Signal(dict)
+
+    def __init__(self, name, max_fps=30, parent=None):
+        super().__init__(parent)
+        self.buffers = {}
+        self.pending = {}
+        self.trackers = {}
+        self.acks = {}
+
+        self.received = 0
+        self.invalid = 0
+        self.applied = 0
+
+        # Whatever arrives within one frame is merged and applied once
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(1000 // max_fps)
+        self.timer.timeout.connect(self.flush)
+
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.accept)
+
+        # A previous instance that crashed leaves its socket file behind
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            raise RuntimeError(f"Can't listen on {name}: {self.server.errorString()}")
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.drop(socket))
+
+    def drop(self, socket):
+        self.buffers.pop(socket, None)
+        self.acks.pop(socket, None)
+        socket.deleteLater()
+
+    def read(self, socket):
+        *lines, rest = (self.buffers[socket] + socket.readAll().data()).split(b"\n")
+        if len(rest) > MAX_LINE:
+            self.invalid += 1
+            rest = b""
+        self.buffers[socket] = rest
+
+        for message in self.parse(lines):
+            if not isinstance(message, dict):
+                self.invalid += 1
+                continue
+
+            # {"segments": {"queued": 10, "done": 30}} or {"segments": [10, 30], "labels": ["queued", "done"]}
+            # A list without labels stays a list, the window names it after the segments defined in its settings
+            if "segments" in message:
+                segments = read_segments(message["segments"], message.get("labels"))
+                if segments is None:
+                    self.invalid += 1
+                    continue
+                unnamed = isinstance(message["segments"], list) and "labels" not in message
+                message["segments"] = list(segments.values()) if unnamed else segments
+
+            if "id" in message:
+                self.acks[socket] = message["id"]
+
+            # Messages naming a tracker go to the dashboard, each tracker is merged on its own
+            if "tracker" in message:
+                pending = self.trackers.setdefault(str(message["tracker"]), {})
+            else:
+                pending = self.pending
+            for field in FIELDS:
+                if field in message:
+                    pending[field] = message[field]
+
+        if (self.pending or self.trackers or self.acks) and not self.timer.isActive():
+            self.timer.start()
+
+    def parse(self, lines):
+        lines = [line for line in lines if line.strip()]
+        self.received += len(lines)
+
+        # One json.loads over the whole burst is several times cheaper than one per line
+        try:
+            return json.loads(b"[" + b",".join(lines) + b"]")
+        except ValueError:
+            pass
+
+        messages = []
+        for line in lines:
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                self.invalid += 1
+        return messages
+
+    def flush(self):
+        state = self.pending
+        self.pending = {}
+        if state:
+            self.applied += 1
+            self.state_received.emit(state)
+
+        trackers = self.trackers
+        self.trackers = {}
+        if trackers:
+            self.applied += 1
+            self.trackers_received.emit(trackers)
+
+        # Tell the clients which of their messages made it to the screen
+        acks = self.acks
+        self.acks = {}
+        for socket, message_id in acks.items():
+            socket.write(json.dumps({"applied": message_id}).encode() + b"\n")
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "invalid": self.invalid,
+            "applied": self.applied,
+        }
+
+    def close(self):
+        self.timer.stop()
+        self.server.close()
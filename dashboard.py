@@ -0,0 +1,157 @@
+import math
+from PySide6.QtWidgets import QMainWindow, QWidget, QSizePolicy
+from PySide6.QtCore import Qt, QRect, QRectF
+from PySide6.QtGui import QPainter, QColor, QGuiApplication
+from chart import DEFAULT_COLOR1, DEFAULT_COLOR2
+from nativechart import paint_pie, label_font
+from theme import theme, theme_index, main_stylesheet
+
+# Below this cell height the percentage labels would not fit
+MIN_LABEL_HEIGHT = 80
+CAPTION_HEIGHT = 16
+
+
+class DashboardChart(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # Trackers are plain rows, not widgets: name, total, current, color1, color2
+        self.index = {}
+        self.trackers = []
+        self.mode = 1
+        self.checkbox = True
+        self.caption_font = label_font()
+        self.caption_font.setPixelSize(11)
+
+        self.grid = None
+        self.paints = 0
+
+    def set_progress(self, name, total=None, current=None, color1=None, color2=None):
+        i = self.index.get(name)
+        if i is None:
+            if total is None or current is None:
+                return
+            i = self.index[name] = len(self.trackers)
+            self.trackers.append([name, 1.0, 0.0, DEFAULT_COLOR1, DEFAULT_COLOR2])
+            # A new tracker reflows the grid, everything moves
+            self.grid = None
+            self.update()
+
+        tracker = self.trackers[i]
+        total = tracker[1] if total is None else total
+        current = tracker[2] if current is None else current
+        if not 0 < total < float("inf") or not 0 <= current <= total:
+            return
+
+        tracker[1:] = [total, current, color1 or tracker[3], color2 or tracker[4]]
+
+        # Only the cell is invalidated, Qt merges all of them into one paint pass
+        self.update(self.cell_rect(i))
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.update()
+
+    def layout_grid(self):
+        if self.grid is None or self.grid[:3] != (len(self.trackers), self.width(), self.height()):
+            # As square as possible for the window's aspect ratio
+            count = max(1, len(self.trackers))
+            columns = max(1, min(count, round(math.sqrt(count * self.width() / max(1, self.height())))))
+            rows = math.ceil(count / columns)
+            self.grid = (len(self.trackers), self.width(), self.height(), columns, rows, self.width() / columns, self.height() / rows)
+        return self.grid[3:]
+
+    def cell_rect(self, i):
+        columns, rows, width, height = self.layout_grid()
+        row, column = divmod(i, columns)
+        return QRect(math.floor(column * width), math.floor(row * height), math.ceil(width) + 1, math.ceil(height) + 1)
+
+    def paintEvent(self, event):
+        self.paints += 1
+        columns, rows, width, height = self.layout_grid()
+        colors = theme(self.mode)
+
+        region = event.region()
+        rect = event.rect()
+        painter = QPainter(self)
+        painter.setClipRegion(region)
+        painter.fillRect(rect, QColor(colors["background"]))
+
+        # Only the cells inside the exposed area get painted
+        first_row = max(0, int(rect.top() // height))
+        last_row = min(rows - 1, int(rect.bottom() // height))
+        first_column = max(0, int(rect.left() // width))
+        last_column = min(columns - 1, int(rect.right() // width))
+
+        font = label_font()
+        font.setPixelSize(max(8, min(14, round(height / 20))))
+        labels = {}
+        checkbox = self.checkbox and height >= MIN_LABEL_HEIGHT
+        pie_height = height - CAPTION_HEIGHT
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                i = row * columns + column
+                if i >= len(self.trackers):
+                    break
+                if not region.intersects(self.cell_rect(i)):
+                    continue
+
+                name, total, current, color1, color2 = self.trackers[i]
+                painter.save()
+                painter.translate(column * width, row * height)
+                painter.setPen(QColor(colors["foreground"]))
+                painter.setFont(self.caption_font)
+                painter.drawText(QRectF(0, 0, width, CAPTION_HEIGHT), Qt.AlignCenter, painter.fontMetrics().elidedText(name, Qt.ElideRight, int(width)))
+                painter.translate(0, CAPTION_HEIGHT)
+                paint_pie(painter, width, pie_height, (current / total, 1 - current / total), (color1, color2), self.mode, checkbox, font, labels)
+                painter.restore()
+
+        painter.end()
+
+
+class DashboardWindow(QMainWindow):
+    def __init__(self, max_fps=30, control=None):
+        super().__init__()
+
+        self.setWindowTitle("PIE dashboard")
+        self.setStyleSheet(main_stylesheet(1))
+        self.chart = DashboardChart()
+        self.setCentralWidget(self.chart)
+
+        screen_geometry = QGuiApplication.primaryScreen().availableGeometry()
+        self.resize(min(1200, screen_geometry.width()), min(800, screen_geometry.height()))
+        self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
+
+        # Trackers are fed through the control socket, {"tracker": name, "total": ..., "current": ...}
+        self.control_server = None
+        if control:
+            from controlserver import ControlServer
+            self.control_server = ControlServer(control, max_fps, self)
+            self.control_server.trackers_received.connect(self.apply_trackers)
+            self.control_server.state_received.connect(self.apply_state)
+
+    def apply_trackers(self, trackers):
+        for name, state in trackers.items():
+            try:
+                total = float(state["total"]) if "total" in state else None
+                current = float(state["current"]) if "current" in state else None
+            except (TypeError, ValueError):
+                continue
+            self.chart.set_progress(name, total, current, state.get("color1"), state.get("color2"))
+
+    def apply_state(self, state):
+        # Untargeted messages only carry the dashboard wide settings
+        try:
+            if "mode" in state:
+                mode = theme_index(state["mode"])
+                if mode != self.chart.mode:
+                    self.setStyleSheet(main_stylesheet(mode))
+                    self.chart.set_mode(mode)
+            if "show_percentage" in state:
+                self.chart.checkbox = bool(state["show_percentage"])
+                self.chart.update()
+        except (TypeError, ValueError):
+            return
@@ -0,0 +1,29 @@
+import os
+from functools import lru_cache
+from PySide6.QtGui import QFont, QFontDatabase
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), "Montserrat-Regular.ttf")
+
+# How many times the font file was handed to Qt, stays at 1 for the life of the process
+registrations = 0
+
+
+@lru_cache(maxsize=None)
+def font_family():
+    global registrations
+    registrations += 1
+
+    # Straight from the resource bundle when it is there, the file next to this module otherwise
+    from resources import register, FONT
+    font_id = QFontDatabase.addApplicationFont(FONT if register() else FONT_PATH)
+    font_families = QFontDatabase.applicationFontFamilies(font_id)
+
+    # None when the font file could not be loaded, widgets then keep the default font
+    if font_id != -1 and font_families:
+        return font_families[0]
+    return None
+
+
+def app_font():
+    family = font_family()
+    return QFont(family) if family else None
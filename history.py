@@ -0,0 +1,95 @@
+import math
+import time
+from array import array
+
+
+class ProgressHistory:
+    def __init__(self, capacity=4096, half_life=10.0):
+        # Three preallocated columns used as one ring buffer, the oldest sample is overwritten
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.totals = array("d", bytes(8 * capacity))
+        self.currents = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+
+        # Exponentially weighted rate in units per second, older speed fades out with this half life
+        self.decay = math.log(2) / half_life
+        self.rate = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def latest(self):
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.times[i], self.totals[i], self.currents[i]
+
+    def add(self, total, current, now=None):
+        now = time.monotonic() if now is None else now
+        last = self.latest()
+
+        # Redrawing the same values (layout toggle, new colors) is not progress
+        if last is not None and last[1:] == (total, current):
+            return
+
+        if last is None or total != last[1] or current < last[2]:
+            # A different job or a restart, the old speed says nothing about it
+            self.rate = 0.0
+        elif now > last[0]:
+            speed = (current - last[2]) / (now - last[0])
+            if self.rate:
+                weight = 1 - math.exp(-self.decay * (now - last[0]))
+                self.rate += weight * (speed - self.rate)
+            else:
+                self.rate = speed
+
+        self.times[self.head] = now
+        self.totals[self.head] = total
+        self.currents[self.head] = current
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def done(self):
+        last = self.latest()
+        return last is not None and last[2] >= last[1]
+
+    def eta(self, now=None):
+        # Seconds left at the current rate, counted down since the last sample; None when unknown
+        last = self.latest()
+        if last is None:
+            return None
+        if last[2] >= last[1]:
+            return 0.0
+        if self.rate <= 0:
+            return None
+
+        now = time.monotonic() if now is None else now
+        return max(0.0, (last[1] - last[2]) / self.rate - (now - last[0]))
+
+    def series(self):
+        # Samples oldest first, for plotting or export, not used on the update path
+        start = (self.head - self.count) % self.capacity
+        return [(self.times[i % self.capacity], self.totals[i % self.capacity], self.currents[i % self.capacity]) for i in range(start, start + self.count)]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.rate = 0.0
+
+
+def format_eta(seconds, prefix="ETA ", done=False):
+    if done:
+        return "done"
+    if seconds is None:
+        return prefix + "--:--"
+
+    seconds = math.ceil(seconds)
+    if seconds >= 100 * 3600:
+        return prefix + "> 99 h"
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{prefix}{hours}:{minutes:02}:{seconds:02}"
+    return f"{prefix}{minutes}:{seconds:02}"
@@ -0,0 +1,236 @@
+import io
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_SIZE = (640, 480)
+MIN_SIZE = 64
+MAX_SIZE = 2048
+
+CHART_FIELDS = ("total", "current", "color1", "color2", "mode", "show_percentage", "segments", "segment_colors")
+
+# Encoded images kept for the latest states, one per state, format and size asked for
+MAX_IMAGES = 16
+
+
+class ChartServer:
+    # The GUI side: the server runs in a process of its own, so pollers never compete with the Qt thread for the GIL
+    def __init__(self, port, host="127.0.0.1"):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--port", str(port), "--host", host], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        # The child prints its port once it listens, only the standard library is imported before that
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Can't serve http on {host}:{port}")
+        self.port = int(line)
+
+        self.state = None
+        self.pending = None
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="pie-http", daemon=True)
+        self.thread.start()
+
+    def publish(self, state):
+        # Called on the GUI thread for every drawn value, a pipe that is full must not hold it up
+        if state == self.state:
+            return
+        self.state = state
+        self.pending = json.dumps(state).encode() + b"\n"
+        self.wakeup.set()
+
+    def run(self):
+        # Runs on the writer thread, only the newest state is sent
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            try:
+                self.process.stdin.write(self.pending)
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                return
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class ChartHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Hundreds of pollers connect at once, the default backlog of 5 turns most of them away
+    request_queue_size = 1024
+
+    def __init__(self, address):
+        super().__init__(address, ChartRequestHandler)
+        self.snapshot = None
+        self.images = {}
+        self.render_lock = threading.Lock()
+        self.chart = None
+
+        self.requests = 0
+        self.not_modified = 0
+        self.renders = 0
+
+    def publish(self, state):
+        # The image key only covers what changes the picture, rate and ETA only change the JSON
+        chart = [state[name] for name in CHART_FIELDS]
+        key = hashlib.blake2b(repr(chart).encode(), digest_size=8).hexdigest()
+
+        # One assignment, a handler reads either the old or the new snapshot, never half of one
+        self.snapshot = (key, state, json.dumps(state).encode())
+
+    def image(self, key, state, fmt, size):
+        # Double checked, a hundred pollers that miss together still encode the image once
+        cache_key = (key, fmt, size)
+        image = self.images.get(cache_key)
+        if image is not None:
+            return image
+
+        with self.render_lock:
+            image = self.images.get(cache_key)
+            if image is None:
+                image = self.render(state, fmt, size)
+                self.images[cache_key] = image
+                self.renders += 1
+
+                # Oldest first, a poller still holding the previous state finds it here instead of encoding it again
+                while len(self.images) > MAX_IMAGES:
+                    del self.images[next(iter(self.images))]
+        return image
+
+    def render(self, state, fmt, size):
+        # The same PieChart as the window, on an Agg figure of its own, only ever used under render_lock
+        if self.chart is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from chart import PieChart
+
+            figure = Figure()
+            FigureCanvasAgg(figure)
+            self.chart = PieChart(figure, blit=False)
+
+        figure = self.chart.figure
+        figure.set_size_inches(size[0] / figure.dpi, size[1] / figure.dpi)
+        if state["segments"]:
+            names = list(state["segments"])
+            self.chart.update_segments([state["segments"][name] for name in names], [state["segment_colors"][name] for name in names], state["mode"], state["show_percentage"])
+        else:
+            self.chart.update(state["current"], state["total"] - state["current"], state["color1"], state["color2"], state["mode"], state["show_percentage"])
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=fmt, facecolor=figure.get_facecolor())
+        return buffer.getvalue()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "renders": self.renders,
+        }
+
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, pollers reuse their connection
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        url = urlsplit(self.path)
+        if url.path == "/stats.json":
+            stats = json.dumps(server.stats()).encode()
+            self.reply(f'"{hashlib.blake2b(stats, digest_size=8).hexdigest()}"', "application/json", lambda: stats)
+            return
+
+        snapshot = server.snapshot
+        if snapshot is None:
+            self.send_error(503, "No chart drawn yet")
+            return
+        key, state, state_json = snapshot
+
+        name, _, fmt = url.path.lstrip("/").partition(".")
+        if url.path == "/state.json":
+            self.reply(f'"{hashlib.blake2b(state_json, digest_size=8).hexdigest()}"', "application/json", lambda: state_json)
+        elif name == "chart" and fmt in FORMATS:
+            size = self.size(parse_qs(url.query))
+            if size is None:
+                self.send_error(400, "w and h must be whole numbers of pixels")
+                return
+            self.reply(f'"{key}-{fmt}-{size[0]}x{size[1]}"', FORMATS[fmt], lambda: server.image(key, state, fmt, size))
+        else:
+            self.send_error(404)
+
+    def size(self, query):
+        try:
+            width = int(query.get("w", [DEFAULT_SIZE[0]])[0])
+            height = int(query.get("h", [DEFAULT_SIZE[1]])[0])
+        except ValueError:
+            return None
+        return min(MAX_SIZE, max(MIN_SIZE, width)), min(MAX_SIZE, max(MIN_SIZE, height))
+
+    def reply(self, etag, content_type, body):
+        # A client that already has this state gets a bodyless 304, nothing is rendered for it
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        try:
+            data = body()
+        except Exception as e:
+            # A state the chart can't draw fails this request, the connection and the server carry on
+            self.send_error(500, f"Can't render the chart: {e}")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def read_states(server):
+    # One JSON state per line from the window, the pipe closing means the window is gone
+    for line in sys.stdin.buffer:
+        server.publish(json.loads(line))
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart server started by pie.py --http, reads states from stdin")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    try:
+        server = ChartHTTPServer((args.host, args.port))
+    except OSError as e:
+        print(f"Can't serve http on {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(server.server_address[1], flush=True)
+
+    # Serving is background work, under load the window gets the CPU first
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+    threading.Thread(target=read_states, args=(server,), daemon=True).start()
+    server.serve_forever()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from measure import rank
+
+# Upper bounds of the histogram buckets in ms, 25% apart from 10 us to about 400 ms, the last one catches everything slower
+BUCKETS = tuple(0.01 * 1.25 ** i for i in range(48)) + (float("inf"),)
+
+# A frame is a chart redraw plus the paint that puts it on screen, the overlay plots these
+FRAME = "draw_chart"
+PAINT = "paint"
+
+NO_SPAN = nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the sample measure.percentile would pick, capped by the slowest sample
+        index = rank(self.count, p)
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen > index:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.start, time.perf_counter())
+
+
+class Recorder:
+    def __init__(self, size=8192):
+        # Off by default, a disabled span is a shared no-op context
+        self.enabled = False
+        self.events = deque(maxlen=size)
+        self.histograms = {}
+        self.origin = time.perf_counter()
+
+    def span(self, name):
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name)
+
+    def add(self, name, start, end):
+        # Spans also close on the rasterizer thread, deque.append is atomic
+        self.events.append((name, start, end - start, threading.get_ident()))
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, Histogram())
+        histogram.add((end - start) * 1000)
+
+    def frames(self, count):
+        # (end, ms) of the newest frames on the GUI thread, oldest first
+        # Spans are stored as they close, in start order a paint nested in draw_chart (a synchronous blit) comes after it
+        main = threading.main_thread().ident
+        events = sorted((event for event in list(self.events)[-16 * count:] if event[3] == main), key=lambda event: event[1])
+        frames = []
+        drawn = None
+        for name, start, duration, _ in events:
+            if name == FRAME:
+                # Redrawn again before anything was painted, both are shown by the same paint
+                end = start + duration
+                drawn = (end, duration) if drawn is None else (end, drawn[1] + duration)
+            elif name == PAINT and drawn is not None:
+                nested = start < drawn[0]
+                frames.append((max(drawn[0], start + duration), 1000 * (drawn[1] if nested else drawn[1] + duration)))
+                drawn = None
+        return frames[-count:]
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def clear(self):
+        self.events.clear()
+        self.histograms.clear()
+
+    def dump_trace(self, path):
+        # Chrome trace event format, open it in chrome://tracing or ui.perfetto.dev
+        threads = {}
+        events = []
+        for name, start, duration, thread in list(self.events):
+            tid = threads.setdefault(thread, len(threads) + 1)
+            events.append({"name": name, "ph": "X", "ts": round((start - self.origin) * 1e6, 1), "dur": round(duration * 1e6, 1), "pid": os.getpid(), "tid": tid})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"histograms": self.summary()}}, f)
+
+    def report(self, file=sys.stderr):
+        rows = self.summary()
+        if not rows:
+            return
+        width = max(len(name) for name in rows)
+        print("spans:", file=file)
+        for name, row in rows.items():
+            print(f"  {name:<{width}}  {row['count']:6} x  p50 {row['p50_ms']:7.2f} ms  p95 {row['p95_ms']:7.2f} ms  max {row['max_ms']:7.2f} ms", file=file)
+
+
+recorder = Recorder()
+span = recorder.span
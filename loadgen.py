@@ -0,0 +1,85 @@
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtNetwork import QLocalSocket
+from measure import percentile
+
+
+class LoadGenerator:
+    def __init__(self, name):
+        self.socket = QLocalSocket()
+        self.socket.connectToServer(name)
+        if not self.socket.waitForConnected(3000):
+            raise RuntimeError(f"Can't connect to {name}: {self.socket.errorString()}")
+
+        self.buffer = b""
+        self.sent = OrderedDict()
+        self.latencies = []
+
+    def send(self, message_id, message):
+        message["id"] = message_id
+        self.sent[message_id] = time.perf_counter()
+        self.socket.write(json.dumps(message).encode() + b"\n")
+
+    def poll(self, timeout_ms=0):
+        self.socket.waitForBytesWritten(0)
+        if not self.socket.waitForReadyRead(timeout_ms):
+            return
+        now = time.perf_counter()
+
+        *lines, self.buffer = (self.buffer + self.socket.readAll().data()).split(b"\n")
+        for line in lines:
+            applied = json.loads(line)["applied"]
+
+            # The server acknowledges the newest id it drew, everything sent before it was coalesced into that frame
+            if applied in self.sent:
+                self.latencies.append(now - self.sent[applied])
+            while self.sent and next(iter(self.sent)) <= applied:
+                self.sent.popitem(last=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push progress updates to a running PIE started with --control NAME")
+    parser.add_argument("name", help="local socket name given to pie.py --control")
+    parser.add_argument("--rate", type=int, default=5000, help="messages per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run")
+    parser.add_argument("--total", type=int, default=1000, help="total sent with every message")
+    parser.add_argument("--trackers", type=int, default=0, help="spread the messages over this many dashboard trackers")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv[:1])
+    generator = LoadGenerator(args.name)
+
+    count = int(args.rate * args.duration)
+    start = time.perf_counter()
+    for i in range(count):
+        # Pace the messages, a late sender catches up in a burst
+        delay = start + i / args.rate - time.perf_counter()
+        if delay > 0:
+            generator.poll(int(delay * 1000))
+        message = {"total": args.total, "current": i % (args.total + 1)}
+        if args.trackers:
+            message["tracker"] = f"job {i % args.trackers}"
+        generator.send(i, message)
+        if i % 100 == 0:
+            generator.poll()
+    elapsed = time.perf_counter() - start
+
+    # Wait for the frame that carries the last message
+    deadline = time.perf_counter() + 2
+    while generator.sent and time.perf_counter() < deadline:
+        generator.poll(100)
+
+    latencies = [latency * 1000 for latency in generator.latencies]
+    print(f"sent {count} messages in {elapsed:.2f} s ({count / elapsed:.0f} msg/s)")
+    print(f"frames acknowledged: {len(latencies)}")
+    print(f"end-to-end latency: p50 {percentile(latencies, 50):.1f} ms, p95 {percentile(latencies, 95):.1f} ms, p99 {percentile(latencies, 99):.1f} ms, max {max(latencies, default=0):.1f} ms")
+    generator.socket.disconnectFromServer()
+    sys.exit(0 if not generator.sent else 1)
+
+
+if __name__ == "__main__":
+    main()
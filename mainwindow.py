@@ -1,27 +1,126 @@
-import os
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as font_manager
-from PySide6.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QDialog, QColorDialog, QCheckBox, QSlider, QSizePolicy, QLayout
-from PySide6.QtCore import Qt, Signal
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from PySide6.QtGui import QFont, QFontDatabase, QGuiApplication
+from PySide6.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QDialog, QColorDialog, QCheckBox, QSlider, QSizePolicy, QLayout, QStyle, QStyleOptionButton
+from PySide6.QtCore import Qt, Signal, QTimer, Property, QEvent
+from PySide6.QtGui import QGuiApplication, QShortcut, QKeySequence, QPainter, QColor
+from scheduler import UpdateScheduler, parse_inputs, format_input
+from chart import DEFAULT_COLOR1, DEFAULT_COLOR2
+from fonts import app_font
+from resources import icon
+from theme import THEMES, theme_index, main_stylesheet, settings_stylesheet
+from instrument import span
+from history import ProgressHistory, format_eta
+from segments import EXAMPLE, DONE, parse_segments, format_segments, read_segments, resolve_segments
+
+
+RENDERERS = ("matplotlib", "native")
+
+
+def create_chart(renderer, cache_mb=0, threaded=False, fast_resize=False):
+    # Import the renderer only when it is used, the native one never touches matplotlib
+    # fast_resize stretches the last frame during a resize drag, native painting is cheap enough to skip it
+    if threaded:
+        from threadedchart import ThreadedChart
+        if renderer == "native":
+            from nativechart import NativeRasterizer
+            return ThreadedChart(NativeRasterizer, fast_resize)
+        else:
+            from mplchart import MplRasterizer
+            return ThreadedChart(lambda: MplRasterizer(copy=False), fast_resize)
+    elif cache_mb:
+        from cachedchart import CachedChart, PixmapCache
+        if renderer == "native":
+            from nativechart import rasterize_native as rasterize
+        else:
+            from mplchart import MplRasterizer
+            rasterize = MplRasterizer()
+        return CachedChart(rasterize, PixmapCache(cache_mb * 1024 * 1024), fast_resize)
+    elif renderer == "native":
+        from nativechart import NativeChart
+        return NativeChart()
+    else:
+        from mplchart import MplChart
+        return MplChart(fast_resize)
+
+
+
+class PendingChart(QWidget):
+    # Stands in for the chart until the renderer is imported, drawing is a no-op
+    def update_pie(self, done, tbd, color1, color2, mode, checkbox):
+        pass
+
+    def update_segments(self, values, colors, mode, checkbox):
+        pass
+
+
+class IconButton(QPushButton):
+    # Draws shared pre-scaled pixmaps, a stylesheet image is decoded and scaled again on every restyle
+    def __init__(self, name, parent=None):
+        super().__init__(parent)
+        self.setObjectName(name)
+        self.setAttribute(Qt.WA_Hover)
+        self.icon_set = "dark"
+        self.preloaded = False
+
+    def get_icons(self):
+        return self.icon_set
+
+    def set_icons(self, icons):
+        self.icon_set = icons
+        self.preloaded = False
+        self.update()
+
+    # Set by the theme stylesheet through qproperty-icons
+    icons = Property(str, get_icons, set_icons)
+
+    def icon_pixmap(self, state):
+        option = QStyleOptionButton()
+        self.initStyleOption(option)
+        rect = self.style().subElementRect(QStyle.SE_PushButtonContents, option, self)
+        return rect, icon(f"{self.objectName()}{state}_{self.icon_set}", rect.width(), rect.height(), self.devicePixelRatioF())
+
+    def preload(self):
+        # Hover and pressed variants are decoded after the first paint, not when the mouse gets there
+        for state in ("_hover", "_pressed"):
+            self.icon_pixmap(state)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+        if self.isDown():
+            state = "_pressed"
+        elif self.underMouse():
+            state = "_hover"
+        else:
+            state = ""
+        rect, pixmap = self.icon_pixmap(state)
+
+        # Centered in the contents rect like the stylesheet image property
+        size = pixmap.deviceIndependentSize().toSize()
+        painter = QPainter(self)
+        painter.drawPixmap(rect.x() + (rect.width() - size.width()) // 2, rect.y() + (rect.height() - size.height()) // 2, pixmap)
+        painter.end()
+
+        if not self.preloaded:
+            self.preloaded = True
+            QTimer.singleShot(0, self, self.preload)
 
 
 
 class SettingsWindow(QDialog):
-    save_clicked = Signal(str, str, bool, int)
+    save_clicked = Signal(str, str, bool, int, str)
     mode_changed = Signal(int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
         self.setWindowTitle("Settings")
+        self.theme = None
         #self.setMinimumSize(350, 200)
         #self.setMaximumSize(350, 200)
 
         layout = QVBoxLayout()
         color1_layout = QHBoxLayout()
         color2_layout = QHBoxLayout()
+        segments_layout = QHBoxLayout()
         checkbox_layout = QHBoxLayout()
         slider_layout = QHBoxLayout()
         side_layout = QHBoxLayout()
@@ -36,40 +135,30 @@ class SettingsWindow(QDialog):
         self.color2_button = QPushButton("Select Color")
         self.color2_button.clicked.connect(self.select_color2)
 
+        # Empty keeps the two slice pie, pushed "segments" values are drawn with these names and colors
+        self.segments_label = QLabel("Segments:")
+        self.segments_edit = QLineEdit()
+        self.segments_edit.setPlaceholderText(EXAMPLE)
+
         self.checkbox_label = QLabel("Show percentage:")
         self.show_percentage = QCheckBox()
 
-        self.light_label = QLabel("Light")
-        self.dark_label = QLabel("Dark")
+        # The slider runs through THEMES, its ends are named after the first and the last theme
+        self.light_label = QLabel(THEMES[0]["name"].capitalize())
+        self.dark_label = QLabel(THEMES[-1]["name"].capitalize())
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setMinimum(0)
-        self.slider.setMaximum(1)
+        self.slider.setMaximum(len(THEMES) - 1)
         self.slider.valueChanged.connect(self.slider_value_changed)
 
         self.save_button = QPushButton("Save settings")
         self.save_button.clicked.connect(self.save_settings)
 
 
-        # Load and set the font
-        font_path = os.path.join(os.path.dirname(__file__), "Montserrat-Regular.ttf")
-        font_id = QFontDatabase.addApplicationFont(font_path)
-        font_families = QFontDatabase.applicationFontFamilies(font_id)
-
-        # Check if the font file was loaded successfully
-        if font_id != -1 and font_families:
-            font_family = font_families[0]
-
-            font = QFont(font_family)
-            self.color1_label.setFont(font)
-            self.color1_edit.setFont(font)
-            self.color1_button.setFont(font)
-            self.color2_label.setFont(font)
-            self.color2_edit.setFont(font)
-            self.color2_button.setFont(font)
-            self.save_button.setFont(font)
-            self.checkbox_label.setFont(font)
-            self.light_label.setFont(font)
-            self.dark_label.setFont(font)        
+        # The dialog font is inherited by all of its widgets
+        font = app_font()
+        if font:
+            self.setFont(font)
 
 
         color1_layout.addWidget(self.color1_label)
@@ -78,6 +167,8 @@ class SettingsWindow(QDialog):
         color2_layout.addWidget(self.color2_label)
         color2_layout.addWidget(self.color2_edit)
         color2_layout.addWidget(self.color2_button)
+        segments_layout.addWidget(self.segments_label)
+        segments_layout.addWidget(self.segments_edit)
         checkbox_layout.addWidget(self.checkbox_label)
         checkbox_layout.addWidget(self.show_percentage)
         slider_layout.addWidget(self.light_label)
@@ -89,6 +180,7 @@ class SettingsWindow(QDialog):
 
         layout.addLayout(color1_layout)
         layout.addLayout(color2_layout)
+        layout.addLayout(segments_layout)
         layout.addLayout(side_layout)
         layout.addWidget(self.save_button)
 
@@ -109,173 +201,11 @@ class SettingsWindow(QDialog):
     def slider_value_changed(self, value):
         self.slider.setValue(value)
         self.mode_changed.emit(value)
-        if value == 0:
-            # Apply light mode styles
-            self.setStyleSheet("""
-                QDialog {
-                    background-color: #E0E0E0;
-                }
-                QLabel {
-                    font-size: 15px;
-                    color: #000000;
-                }
-                QLineEdit {
-                    padding: 2px;
-                    font-size: 15px;
-                    color: #000000;
-                    border: 1px solid #000000;
-                    border-radius: 4px;
-                    background-color: #FFFFFF;
-                    selection-color: yellow;
-                    selection-background-color: blue;
-                }
-                QPushButton {
-                    padding: 6px 12px;
-                    font-size: 10px;
-                    border: 1px solid #000000;
-                    border-radius: 4px;
-                    background-color: #4787BD;
-                    color: #000000;
-                }
-                QPushButton:hover {
-                    background-color: #3E76A6;
-                }
-                QPushButton:pressed {
-                    background-color: #36668F;
-                }
-                QSlider {
-                    background-color: transparent;
-                    height: 30px;
-                    padding: 0;
-                }
-                QSlider::groove:horizontal {
-                    background-color: #333333;
-                    height: 6px;
-                    border-radius: 3px;
-                }
-                QSlider::handle:horizontal {
-                    background-color: #000000;
-                    width: 20px;
-                    height: 20px;
-                    margin: -7px 0;
-                    border-radius: 10px;
-                }
-                QSlider::handle:horizontal:hover {
-                    background-color: #333333;
-                }
-                QSlider::handle:horizontal:pressed {
-                    background-color: #555555;
-                }
-                QCheckBox {
-                    spacing: 5px;
-                }
-                QCheckBox::indicator {
-                    width: 20px;
-                    height: 20px;
-                }
-                QCheckBox::indicator:unchecked {
-                    image: url(images/checkbox_unchecked_light.png);
-                }
-                QCheckBox::indicator:unchecked:hover {
-                    image: url(images/checkbox_unchecked_hover_light.png);
-                }
-                QCheckBox::indicator:unchecked:pressed {
-                    image: url(images/checkbox_unchecked_pressed_light.png);
-                }
-                QCheckBox::indicator:checked {
-                    image: url(images/checkbox_checked_light.png);
-                }
-                QCheckBox::indicator:checked:hover {
-                    image: url(images/checkbox_checked_hover_light.png);
-                }
-                QCheckBox::indicator:checked:pressed {
-                    image: url(images/checkbox_checked_pressed_light.png);
-                }
-            """)
 
-        else:
-            # Apply dark mode styles
-            self.setStyleSheet("""
-                QDialog {
-                    background-color: #333333;
-                }
-                QLabel {
-                    font-size: 15px;
-                    color: #FFFFFF;
-                }
-                QLineEdit {
-                    padding: 2px;
-                    font-size: 15px;
-                    color: #FFFFFF;
-                    border: 1px solid #FFFFFF;
-                    border-radius: 4px;
-                    background-color: #222222;
-                    selection-color: yellow;
-                    selection-background-color: blue;
-                }
-                QPushButton {
-                    padding: 6px 12px;
-                    font-size: 10px;
-                    border: 1px solid #FFFFFF;
-                    border-radius: 4px;
-                    background-color: #286090;
-                    color: #FFFFFF;
-                }
-                QPushButton:hover {
-                    background-color: #1A4D73;
-                }
-                QPushButton:pressed {
-                    background-color: #144057;
-                }
-                QSlider {
-                    background-color: transparent;
-                    height: 30px;
-                    padding: 0;
-                }
-                QSlider::groove:horizontal {
-                    background-color: #E0E0E0;
-                    height: 6px;
-                    border-radius: 3px;
-                }
-                QSlider::handle:horizontal {
-                    background-color: #FFFFFF;
-                    width: 20px;
-                    height: 20px;
-                    margin: -7px 0;
-                    border-radius: 10px;
-                }
-                QSlider::handle:horizontal:hover {
-                    background-color: #DDDDDD;
-                }
-                QSlider::handle:horizontal:pressed {
-                    background-color: #BBBBBB;
-                }
-                QCheckBox {
-                    spacing: 5px;
-                }
-                QCheckBox::indicator {
-                    width: 20px;
-                    height: 20px;
-                }
-                QCheckBox::indicator:unchecked {
-                    image: url(images/checkbox_unchecked_dark.png);
-                }
-                QCheckBox::indicator:unchecked:hover {
-                    image: url(images/checkbox_unchecked_hover_dark.png);
-                }
-                QCheckBox::indicator:unchecked:pressed {
-                    image: url(images/checkbox_unchecked_pressed_dark.png);
-                }
-                QCheckBox::indicator:checked {
-                    image: url(images/checkbox_checked_dark.png);
-                }
-                QCheckBox::indicator:checked:hover {
-                    image: url(images/checkbox_checked_hover_dark.png);
-                }
-                QCheckBox::indicator:checked:pressed {
-                    image: url(images/checkbox_checked_pressed_dark.png);
-                }
-            """)
+        # Restyling re-polishes every child, only do it when the theme really changes
+        if value != self.theme:
+            self.theme = value
+            self.setStyleSheet(settings_stylesheet(value))
 
 
     def save_settings(self):
@@ -283,8 +213,14 @@ class SettingsWindow(QDialog):
         color2 = self.color2_edit.text()
         state = self.show_percentage.isChecked()
         value = self.slider.value()
-
-        self.save_clicked.emit(color1, color2, state, value)
+        segments = self.segments_edit.text()
+        if parse_segments(segments) is None:
+            # Stay open on a bad color or a repeated name
+            self.segments_edit.setFocus()
+            self.segments_edit.selectAll()
+            return
+
+        self.save_clicked.emit(color1, color2, state, value, segments)
         self.close()
 
 
@@ -298,95 +234,269 @@ class SettingsWindow(QDialog):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, renderer="matplotlib", max_fps=30, debounce_ms=0, cache_mb=0, control=None, fast_start=False, profile=None, threaded=False, source=None, animate_ms=0, easing="OutCubic", http=None, fast_resize=False, record=None):
         super().__init__()
 
         self.setWindowTitle("PIE")
+        self.theme = None
+        self.settings_window = None
+        self.renderer = renderer
+        self.cache_mb = cache_mb
+        self.threaded = threaded
+        self.fast_resize = fast_resize
+        self.profile = profile
+        self.first_paint = True
+        self.overlay = None
+        self.scheduler = UpdateScheduler(self.draw_chart, max_fps, debounce_ms, self)
+
+        # Every drawn (total, current) goes into the history, the ETA label counts down between updates
+        self.history = ProgressHistory()
+        self.eta_timer = QTimer(self)
+        self.eta_timer.setInterval(1000)
+        self.eta_timer.timeout.connect(self.update_eta)
+
+        # Nothing is drawn while the window is minimized, hidden or covered, the latest values are drawn once it is back
+        self.idle = False
+        self.drawn = None
+        self.latest = None
+        self.watched_window = None
+
+        # Optional local HTTP server with the chart as PNG/SVG and the state as JSON, served from a child process
+        self.chart_server = None
+        if http is not None:
+            from httpserver import ChartServer
+            self.chart_server = ChartServer(http)
+
+        # Optional append-only log of what the user did, replay.py plays it back against a headless window
+        self.session_log = None
+        if record is not None:
+            from sessionlog import SessionLog
+            screen = QGuiApplication.primaryScreen()
+            self.session_log = SessionLog(record, {
+                "renderer": renderer, "max_fps": max_fps, "debounce_ms": debounce_ms, "cache_mb": cache_mb, "threaded": threaded,
+                "animate_ms": animate_ms, "easing": easing, "fast_resize": fast_resize,
+                "platform": QGuiApplication.platformName(), "dpr": screen.devicePixelRatio() if screen else 1.0,
+            })
+
+        # Segment definitions from the settings and the last pushed segment values, None draws done against remaining
+        self.segments = []
+        self.segment_values = None
+
+        # Optional eased sweep from the shown value to a new one, redrawn on its own frame clock
+        self.animator = None
+        if animate_ms:
+            from animation import PieAnimator
+            self.animator = PieAnimator(self.draw_frame, animate_ms, easing, parent=self)
 
         # Default dark mode
         self.set_mode(1)
+        self.mark("stylesheet")
                 
         self.main_widget = QWidget()
         self.setCentralWidget(self.main_widget)
         self.layout = QVBoxLayout()     
+        self.main_widget.setLayout(self.layout)
 
         self.input_layout = QHBoxLayout()      
         self.input2_layout = QHBoxLayout()
 
-        # Set main layout as a default
-        self.set_main_layout()
-
-        # Load and set the font
-        font_path = os.path.join(os.path.dirname(__file__), "Montserrat-Regular.ttf")
-        font_id = QFontDatabase.addApplicationFont(font_path)
-        font_families = QFontDatabase.applicationFontFamilies(font_id)
+        # One canvas shared by both layouts, it is moved between them and never re-created
+        # With fast_start a placeholder holds its place until the window has been painted once
+        if fast_start:
+            self.canvas = PendingChart()
+        else:
+            self.canvas = create_chart(self.renderer, cache_mb, threaded, fast_resize)
+            self.mark("chart imports")
 
-        # Check if the font file was loaded successfully
-        if font_id != -1 and font_families:
-            font_family = font_families[0]
+        # Register the font once per process
+        app_font()
+        self.mark("font registration")
 
-            # Set the font of the QLabel objects
-            font = QFont(font_family)
-            self.input1_label.setFont(font)
-            self.input2_label.setFont(font)
+        # Set main layout as a default
+        self.set_main_layout()
+        self.mark("layout")
 
 
         # Default colors for the pie chart
-        self.color1 = "#56CA3D"
-        self.color2 = "#CA3D3D"
+        self.color1 = DEFAULT_COLOR1
+        self.color2 = DEFAULT_COLOR2
         self.checkbox = True
         self.mode = 1
         self.is_mini_layout = False
         
         self.update_chart() # For intial pie chart
-
+        if not fast_start:
+            self.mark("first render")
+
+        # Optional local socket that lets other processes push progress
+        self.control_server = None
+        if control:
+            from controlserver import ControlServer
+            self.control_server = ControlServer(control, max_fps, self)
+            self.control_server.state_received.connect(self.apply_remote_state)
+
+        # Optional directory or log file polled off the GUI thread, it feeds the same path as the socket
+        self.source_watcher = None
+        if source is not None:
+            from sources import SourceWatcher
+            self.source_watcher = SourceWatcher(source, getattr(source, "min_interval", 100), parent=self)
+            self.source_watcher.state_received.connect(self.apply_remote_state)
+
+        # F3 shows recent frame times over the chart, recording starts with it
+        QShortcut(QKeySequence("F3"), self, self.toggle_overlay)
+
+
+    def record(self, kind, *args):
+        if self.session_log is not None:
+            self.session_log.write(kind, *args)
+
+    def mark(self, phase):
+        if self.profile is not None:
+            self.profile.mark(phase)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint:
+            return
+        self.first_paint = False
+        self.mark("first paint")
+
+        if isinstance(self.canvas, PendingChart):
+            # Let the paint reach the screen before the chart backend gets imported
+            QTimer.singleShot(0, self, self.build_chart)
+        elif self.profile is not None:
+            self.profile.report()
+
+    def build_chart(self):
+        chart = create_chart(self.renderer, self.cache_mb, self.threaded, self.fast_resize)
+        self.mark("chart imports")
+
+        self.layout.replaceWidget(self.canvas, chart)
+        self.canvas.deleteLater()
+        self.canvas = chart
+        self.drawn = None
+        self.update_chart()
+        self.mark("first render")
+
+        if self.profile is not None:
+            self.profile.report()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+
+        # Changing the window flags creates a new native window, watch whichever is current
+        if self.windowHandle() is not self.watched_window:
+            self.watched_window = self.windowHandle()
+            self.watched_window.installEventFilter(self)
+        self.update_idle()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_idle()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.update_idle()
+
+    def eventFilter(self, watched, event):
+        # Platforms that track occlusion unexpose a fully covered window
+        if event.type() == QEvent.Expose:
+            self.update_idle()
+        return False
+
+    def update_idle(self):
+        handle = self.windowHandle()
+        idle = not self.isVisible() or self.isMinimized() or (handle is not None and not handle.isExposed())
+        if idle == self.idle:
+            return
+        self.idle = idle
+
+        if self.source_watcher is not None:
+            self.source_watcher.set_idle(idle)
+        if self.overlay is not None:
+            self.overlay.set_idle(idle)
+
+        if idle:
+            self.eta_timer.stop()
+            if self.animator is not None and self.animator.running():
+                # Freeze the sweep, the catch-up redraw continues it from there
+                self.animator.stop()
+                self.drawn = None
+        elif self.latest is not None:
+            # Catch up with everything that arrived meanwhile in a single redraw
+            self.draw_chart(*self.latest)
+
+    def toggle_overlay(self):
+        if self.overlay is None:
+            from overlay import FrameOverlay
+            self.overlay = FrameOverlay(self)
+        self.overlay.toggle()
 
     def toggle_layout(self):
-        if self.is_mini_layout:
-            self.delete_layout_items(self.layout)
-            self.set_main_layout()
-            
-            self.update_chart()
-            self.show()
+        self.record("toggle")
+        with span("toggle_layout"):
+            if self.is_mini_layout:
+                with span("delete_layout_items"):
+                    self.delete_layout_items(self.layout)
+                with span("set_main_layout"):
+                    self.set_main_layout()
+                    self.show_layout_items(self.layout)
+                
+                self.scheduler.cancel()
+                self.redraw()
+                with span("show"):
+                    self.show()
 
-            self.is_mini_layout = False
+                self.is_mini_layout = False
 
-        else:
-            self.delete_layout_items(self.layout)
-            self.set_mini_layout()
-            
-            self.update_chart()
-            self.show()
+            else:
+                with span("delete_layout_items"):
+                    self.delete_layout_items(self.layout)
+                with span("set_mini_layout"):
+                    self.set_mini_layout()
+                    self.show_layout_items(self.layout)
+                
+                self.scheduler.cancel()
+                self.redraw()
+                with span("show"):
+                    self.show()
 
-            self.is_mini_layout = True
+                self.is_mini_layout = True
 
 
 
     def set_main_layout(self):  
 
-        # Create input fields
-        self.input1_label = QLabel("Total:")
-        self.input1_edit = QLineEdit("4")
-        self.input1_edit.textEdited.connect(self.update_chart)
+        # Create input fields, parented right away since top-level widgets that get reparented leak on every toggle
+        self.input1_label = QLabel("Total:", self.main_widget)
+        total, current = self.input_texts()
+        self.input1_edit = QLineEdit(total, self.main_widget)
+        self.input1_edit.textEdited.connect(self.input_edited)
+
+        self.input2_label = QLabel("Current:", self.main_widget)
 
-        self.input2_label = QLabel("Current:")
-        self.input2_edit = QLineEdit("1")
-        self.input2_edit.textEdited.connect(self.update_chart)
+        # Set the font of the QLabel objects
+        font = app_font()
+        if font:
+            self.input1_label.setFont(font)
+            self.input2_label.setFont(font)
+        self.input2_edit = QLineEdit(current, self.main_widget)
+        self.input2_edit.textEdited.connect(self.input_edited)
 
-        self.settings_button = QPushButton()
-        self.settings_button.setObjectName("settings")    
+        self.eta_prefix = "ETA "
+        self.eta_label = QLabel(format_eta(self.history.eta(), self.eta_prefix), self.main_widget)
+        if font:
+            self.eta_label.setFont(font)
+
+        self.settings_button = IconButton("settings", self.main_widget)
         self.settings_button.setFixedSize(30, 30)
         self.settings_button.clicked.connect(self.open_settings)
 
-        self.mini_button = QPushButton()
-        self.mini_button.setObjectName("mini")
+        self.mini_button = IconButton("mini", self.main_widget)
         self.mini_button.setFixedSize(30, 30)
         self.mini_button.clicked.connect(self.toggle_layout)
 
-        # Create a canvas for the matplotlib chart
-        self.figure = plt.figure()
-        self.canvas = FigureCanvas(self.figure)
-
         # Set size and position of the window
         screen = QGuiApplication.primaryScreen()
         screen_geometry = screen.availableGeometry()
@@ -407,34 +517,36 @@ class MainWindow(QMainWindow):
         self.input_layout.addWidget(self.input1_edit)
         self.input_layout.addWidget(self.input2_label)
         self.input_layout.addWidget(self.input2_edit)
+        self.input_layout.addWidget(self.eta_label)
         self.input_layout.addWidget(self.settings_button)
         self.input_layout.addWidget(self.mini_button)
 
         self.layout.addLayout(self.input_layout)
         self.layout.addWidget(self.canvas) 
 
-        self.main_widget.setLayout(self.layout)
-        self.setCentralWidget(self.main_widget)
-
     def set_mini_layout(self):
         # Create input fields
-        self.input1_edit = QLineEdit("4")
+        total, current = self.input_texts(5)
+        self.input1_edit = QLineEdit(total, self.main_widget)
         self.input1_edit.setMaxLength(5)  # Limiting to 5 characters
-        self.input1_edit.textEdited.connect(self.update_chart)
+        self.input1_edit.textEdited.connect(self.input_edited)
 
-        self.input2_edit = QLineEdit("1")
+        self.input2_edit = QLineEdit(current, self.main_widget)
         self.input2_edit.setMaxLength(5)  # Limiting to 5 characters
-        self.input2_edit.textEdited.connect(self.update_chart)
+        self.input2_edit.textEdited.connect(self.input_edited)
+
+        # No room for the prefix in the mini window, the tooltip says what it is
+        self.eta_prefix = ""
+        self.eta_label = QLabel(format_eta(self.history.eta(), self.eta_prefix), self.main_widget)
+        self.eta_label.setToolTip("ETA")
+        font = app_font()
+        if font:
+            self.eta_label.setFont(font)
 
-        self.main_button = QPushButton()
-        self.main_button.setObjectName("main")
+        self.main_button = IconButton("main", self.main_widget)
         self.main_button.setFixedSize(20, 20)
         self.main_button.clicked.connect(self.toggle_layout)
 
-        # Create a canvas for the matplotlib chart
-        self.figure = plt.figure()
-        self.canvas = FigureCanvas(self.figure)
-
         # Set size and position of the window
         screen = QGuiApplication.primaryScreen()
         screen_geometry = screen.availableGeometry()
@@ -454,20 +566,35 @@ class MainWindow(QMainWindow):
         self.input2_layout.addWidget(self.main_button)
         self.input2_layout.addWidget(self.input1_edit)
         self.input2_layout.addWidget(self.input2_edit)
+        self.input2_layout.addWidget(self.eta_label)
         #self.input2_layout.setSizeConstraint(QLayout.SetMinimumSize)  # Set size policy
 
 
         self.layout.addWidget(self.canvas)
         self.layout.addLayout(self.input2_layout)
 
-        self.main_widget.setLayout(self.layout)
-        self.setCentralWidget(self.main_widget)
 
+    def input_texts(self, width=None):
+        # A rebuilt layout continues from the last drawn values, typed or pushed
+        if self.latest is None:
+            return "4", "1"
+        return format_input(self.latest[0], width), format_input(self.latest[1], width)
+
+    def show_layout_items(self, layout):
+        # Children created under an already visible widget stay hidden until they are shown
+        for i in range(layout.count()):
+            item = layout.itemAt(i)
+            if item.widget():
+                item.widget().show()
+            elif item.layout():
+                self.show_layout_items(item.layout())
 
     def delete_layout_items(self, layout):
         while layout.count() > 0:
             item = layout.takeAt(0)
             widget = item.widget()
+            if widget is self.canvas:
+                continue
             if widget:
                 widget.deleteLater()
             else:
@@ -475,167 +602,182 @@ class MainWindow(QMainWindow):
 
 
     def open_settings(self):
-        settings_window = SettingsWindow(self)
+        # The dialog is built on first use and shown again afterwards
+        if self.settings_window is None:
+            self.settings_window = SettingsWindow(self)
+            self.settings_window.mode_changed.connect(self.select_mode)
+            self.settings_window.save_clicked.connect(self.handle_settings_saved)
+
+        settings_window = self.settings_window
         settings_window.slider_value_changed(self.mode)
         settings_window.color1_edit.setText(self.color1)
         settings_window.color2_edit.setText(self.color2)
         settings_window.show_percentage.setChecked(self.checkbox)
-        settings_window.mode_changed.connect(self.set_mode)
-        settings_window.save_clicked.connect(self.handle_settings_saved)
+        settings_window.segments_edit.setText(format_segments(self.segments))
         settings_window.exec()
 
     
-    def handle_settings_saved(self, color1, color2, state, value):
+    def handle_settings_saved(self, color1, color2, state, value, segments):
+        self.record("settings", color1, color2, state, value, segments)
         self.color1 = color1
         self.color2 = color2
         self.checkbox = state
         self.mode = value
-        self.update_chart()
+        self.segments = parse_segments(segments) or []
+        self.redraw()
+
+    def apply_remote_state(self, state):
+        self.record("remote", state)
+
+        # A color no renderer can draw would break every later redraw, the whole message is dropped instead
+        colors = {name: str(state[name]) for name in ("color1", "color2") if name in state}
+        if not all(QColor.isValidColorName(color) for color in colors.values()):
+            return
+        self.color1 = colors.get("color1", self.color1)
+        self.color2 = colors.get("color2", self.color2)
+
+        try:
+            if "show_percentage" in state:
+                self.checkbox = bool(state["show_percentage"])
+            if "mode" in state and theme_index(state["mode"]) != self.mode:
+                self.mode = theme_index(state["mode"])
+                self.set_mode(self.mode)
+            if "segments" in state:
+                # {"queued": 10, "running": 2, "failed": 1, "done": 30} or a list in the defined order, total and current follow from them
+                segment_values = read_segments(state["segments"], names=[name for name, _ in self.segments])
+                if segment_values is not None:
+                    self.segment_values = segment_values
+                    state = dict(state, total=sum(segment_values.values()), current=segment_values.get(DONE, 0))
+        except (TypeError, ValueError):
+            return
+
+        # A field in the mini layout may only hold a cut off copy, a partial push continues from what is drawn
+        total, current = self.latest or (self.input1_edit.text(), self.input2_edit.text())
+        values = parse_inputs(str(state.get("total", total)), str(state.get("current", current)))
+        if values is None:
+            # Keep the last good values on screen, only the colors or mode changed
+            self.redraw()
+            return
+
+        self.input1_edit.setText(format_input(values[0], self.input1_edit.maxLength()))
+        self.input2_edit.setText(format_input(values[1], self.input2_edit.maxLength()))
+        self.scheduler.cancel()
+        self.draw_chart(*values)
+
+    def select_mode(self, value):
+        # Opening the settings moves the slider to the current mode, only real changes are recorded
+        if value != self.theme:
+            self.record("mode", value)
+        self.set_mode(value)
 
     def set_mode(self, value):
-        if value == 0:
-            # Apply light mode styles
-            self.setStyleSheet("""
-                QMainWindow {
-                    background-color: #E0E0E0;
-                }
-                QLabel {
-                    font-size: 15px;
-                    color: #000000;
-                }
-                QLineEdit {
-                    padding: 2px;
-                    color: #000000;
-                    font-size: 15px;
-                    border: 1px solid #000000;
-                    border-radius: 4px;
-                    background-color: #FFFFFF;
-                    selection-color: yellow;
-                    selection-background-color: blue;
-                }
-                QPushButton {
-                    border: 1px solid #000000;
-                    border-radius: 4px;
-                }
-                #settings {
-                    image: url(images/settings_light.png);
-                }
-                #settings:hover {
-                    image: url(images/settings_hover_light.png);
-                }
-                #settings:pressed {
-                    image: url(images/settings_pressed_light.png);
-                }
-                #mini {
-                    image: url(images/mini_light.png);
-                }
-                #mini:hover {
-                    image: url(images/mini_hover_light.png);
-                }
-                #mini:pressed {
-                    image: url(images/mini_pressed_light.png);
-                }
-                #main {
-                    image: url(images/main_light.png);
-                }
-                #main:hover {
-                    image: url(images/main_hover_light.png);
-                }
-                #main:pressed {
-                    image: url(images/main_pressed_light.png);
-                }
-            """)
-
-        else:
-            # Apply dark mode styles
-            self.setStyleSheet("""
-                QMainWindow {
-                    background-color: #333333;
-                }
-                QLabel {
-                    font-size: 15px;
-                    color: #FFFFFF;
-                }
-                QLineEdit {
-                    padding: 2px;
-                    color: #FFFFFF;
-                    font-size: 15px;
-                    border: 1px solid #FFFFFF;
-                    border-radius: 4px;
-                    background-color: #222222;
-                    selection-color: yellow;
-                    selection-background-color: blue;
-                }
-                QPushButton {
-                    border: 1px solid #FFFFFF;
-                    border-radius: 4px;
-                }
-                #settings {
-                    image: url(images/settings_dark.png);
-                }
-                #settings:hover {
-                    image: url(images/settings_hover_dark.png);
-                }
-                #settings:pressed {
-                    image: url(images/settings_pressed_dark.png);
-                }
-                #mini {
-                    image: url(images/mini_dark.png);
-                }
-                #mini:hover {
-                    image: url(images/mini_hover_dark.png);
-                }
-                #mini:pressed {
-                    image: url(images/mini_pressed_dark.png);
-                }
-                #main {
-                    image: url(images/main_dark.png);
-                }
-                #main:hover {
-                    image: url(images/main_hover_dark.png);
-                }
-                #main:pressed {
-                    image: url(images/main_pressed_dark.png);
-                }
-            """)
+        # Restyling re-polishes every child, only do it when the theme really changes
+        with span("set_mode"):
+            if value != self.theme:
+                self.theme = value
+                with span("stylesheet"):
+                    stylesheet = main_stylesheet(value)
+                with span("polish"):
+                    self.setStyleSheet(stylesheet)
+
+    def input_edited(self):
+        self.record("edit", self.input1_edit.text(), self.input2_edit.text())
+
+        # Typed values go back to done against remaining
+        self.segment_values = None
+
+        # Typing only queues the latest values, the scheduler redraws at most max_fps times a second
+        self.scheduler.submit_text(self.input1_edit.text(), self.input2_edit.text())
+
+    def redraw(self):
+        # The last drawn values in the current style, the fields are not read again since the mini ones cut long values off
+        if self.latest is None:
+            self.update_chart()
+        elif self.scheduler.pending is None:
+            self.draw_chart(*self.latest)
 
     def update_chart(self):
-        # Get the input values from the input fields
-        input1 = float(self.input1_edit.text())
-        input2 = float(self.input2_edit.text())
+        # Drawing straight from the fields supersedes whatever the scheduler still holds
+        self.scheduler.cancel()
+
+        with span("update_chart"):
+            # Get the input values from the input fields
+            with span("parse"):
+                values = parse_inputs(self.input1_edit.text(), self.input2_edit.text())
+            if values is not None:
+                # Pushed segments only stand for the inputs while those still show their sum
+                if self.segment_values is not None and values != self.latest:
+                    self.segment_values = None
+                self.draw_chart(*values)
+
+    def draw_chart(self, total, current):
+        # Progress is recorded even when it is not drawn
+        self.history.add(total, current)
+        self.latest = (total, current)
+
+        segments = resolve_segments(self.segments, self.segment_values) if self.segment_values else None
+        state = (total, current, self.color1, self.color2, self.mode, self.checkbox, segments)
+        if self.chart_server is not None:
+            # Pollers still get every value while the window itself is idle
+            self.chart_server.publish(self.http_state(total, current, segments))
+        if self.idle:
+            return
+        if state == self.drawn:
+            self.update_eta()
+            return
 
         # Perform calculations and generate data for the pie chart
-        done = input2
-        tbd = input1 - input2
-
-        # Generate the data for the pie chart
-        values = [done, tbd]
-
-        # Clear the previous plot
-        self.figure.clear()
-
-        # Create the pie chart using Matplotlib
-        ax = self.figure.add_subplot(111)
-        #font_properties = font_manager.FontProperties(fname="Montserrat-Regular.ttf", size=15) 
-
-
-        if self.mode:
-            self.figure.set_facecolor('#333333') 
-            #ax.set_title('', color='#FFFFFF', fontdict={"fontproperties": font_properties})
-            if self.checkbox:
-                ax.pie(values, startangle=90, counterclock=False, colors=[self.color1, self.color2], autopct='%1.1f%%', wedgeprops={"linewidth": 1, "edgecolor": "white"})
-            else:
-                ax.pie(values, startangle=90, counterclock=False, colors=[self.color1, self.color2], wedgeprops={"linewidth": 1, "edgecolor": "white"})
+        done = current
+        tbd = total - current
+
+        if segments is not None:
+            # Several slices have no single fraction to sweep, they are drawn as they come
+            if self.animator is not None:
+                self.animator.reset()
+            with span("draw_chart"):
+                self.canvas.update_segments(segments[1], segments[2], self.mode, self.checkbox)
+        elif self.animator is not None:
+            # A new target while sweeping redirects the running animation
+            self.animator.animate_to(done / total)
         else:
-            self.figure.set_facecolor('#E0E0E0') 
-            #ax.set_title('', color='#000000', fontdict={"fontproperties": font_properties})
-            if self.checkbox:
-                ax.pie(values, startangle=90, counterclock=False, colors=[self.color1, self.color2], autopct='%1.1f%%', wedgeprops={"linewidth": 1, "edgecolor": "black"})
-            else:
-                ax.pie(values, startangle=90, counterclock=False, colors=[self.color1, self.color2], wedgeprops={"linewidth": 1, "edgecolor": "black"})
-
-        ax.axis('equal')
-
-        # Update the canvas
-        self.canvas.draw()
-
+            # Move the existing wedges and redraw only them
+            with span("draw_chart"):
+                self.canvas.update_pie(done, tbd, self.color1, self.color2, self.mode, self.checkbox)
+        self.drawn = state
+
+        self.update_eta()
+
+    def draw_frame(self, frac):
+        frac = min(1.0, max(0.0, frac))
+        with span("draw_chart"):
+            self.canvas.update_pie(frac, 1 - frac, self.color1, self.color2, self.mode, self.checkbox)
+
+    def http_state(self, total, current, segments):
+        state = {
+            "total": total,
+            "current": current,
+            "color1": self.color1,
+            "color2": self.color2,
+            "mode": self.mode,
+            "show_percentage": bool(self.checkbox),
+            "segments": None,
+            "segment_colors": None,
+            "rate": self.history.rate,
+            "eta": self.history.eta(),
+        }
+        if segments is not None:
+            names, values, colors = segments
+            state["segments"] = dict(zip(names, values))
+            state["segment_colors"] = dict(zip(names, colors))
+        return state
+
+    def update_eta(self):
+        eta = self.history.eta()
+        self.eta_label.setText(format_eta(eta, self.eta_prefix, self.history.done()))
+        self.eta_label.setToolTip(f"ETA, {self.history.rate:.3g} per second" if self.history.rate > 0 else "ETA")
+
+        # Only tick while there is something to count down
+        if not eta:
+            self.eta_timer.stop()
+        elif not self.eta_timer.isActive():
+            self.eta_timer.start()
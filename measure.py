@@ -0,0 +1,23 @@
+import os
+
+
+def rss_kb():
+    # Current resident set size, peak RSS where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def rank(count, p):
+    # Index of the p-th percentile among count sorted samples, nearest rank
+    return min(count - 1, int(count * p / 100))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[rank(len(values), p)]
@@ -0,0 +1,72 @@
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PySide6.QtGui import QImage, QPainter, QResizeEvent
+from chart import PieChart
+from scheduler import ResizeGate
+from instrument import span
+
+
+class MplChart(FigureCanvas):
+    def __init__(self, fast_resize=False):
+        # A plain Figure stays out of pyplot's global figure manager
+        # The Qt canvas sizes it to the widget in physical pixels (inches from dpi times devicePixelRatio) on every resize
+        super().__init__(Figure())
+        self.chart = PieChart(self.figure)
+        self.resize_gate = ResizeGate(self.settle, parent=self) if fast_resize else None
+        self.preview = None
+
+    def update_pie(self, done, tbd, color1, color2, mode, checkbox):
+        self.chart.update(done, tbd, color1, color2, mode, checkbox)
+
+    def update_segments(self, values, colors, mode, checkbox):
+        self.chart.update_segments(values, colors, mode, checkbox)
+
+    def resizeEvent(self, event):
+        if self.resize_gate is None or not self.resize_gate.resized():
+            super().resizeEvent(event)
+            return
+
+        # Mid-drag the last frame is stretched, matplotlib renders again once the size settles
+        if self.preview is None:
+            buffer = self.get_renderer().buffer_rgba()
+            self.preview = QImage(buffer, buffer.shape[1], buffer.shape[0], 4 * buffer.shape[1], QImage.Format_RGBA8888).copy()
+        self.update()
+
+    def settle(self):
+        self.preview = None
+        super().resizeEvent(QResizeEvent(self.size(), self.size()))
+
+    def paintEvent(self, event):
+        with span("paint"):
+            if self.preview is None:
+                super().paintEvent(event)
+                return
+            painter = QPainter(self)
+            painter.drawImage(self.rect(), self.preview)
+            painter.end()
+
+
+class MplRasterizer:
+    def __init__(self, copy=True):
+        # An offscreen Agg figure, it never touches a Qt widget
+        self.copy = copy
+        self.buffer = None
+        self.figure = Figure()
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.chart = PieChart(self.figure, blit=False)
+
+    def __call__(self, fracs, colors, mode, checkbox, width, height, dpr):
+        self.figure.set_dpi(100 * dpr)
+        self.figure.set_size_inches(width / 100, height / 100)
+        self.chart.update_segments(fracs, colors, mode, checkbox)
+        with span("canvas.draw"):
+            self.canvas.draw()
+
+        # Without copy the image is a view of the Agg buffer, valid until the next call
+        self.buffer = self.canvas.buffer_rgba()
+        image = QImage(self.buffer, self.buffer.shape[1], self.buffer.shape[0], 4 * self.buffer.shape[1], QImage.Format_RGBA8888)
+        if self.copy:
+            image = image.copy()
+        image.setDevicePixelRatio(dpr)
+        return image
@@ -0,0 +1,127 @@
+import math
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtCore import Qt, QPointF, QRectF, QSize
+from PySide6.QtGui import QPainter, QColor, QPen, QFont, QImage, QStaticText
+from chart import DEFAULT_COLOR1, DEFAULT_COLOR2, facecolor, edgecolor, pie_fractions, pie_slices
+from instrument import span
+
+
+def pie_geometry(width, height):
+    # Same placement as the default subplot, axis('equal') leaves the pie 1.1 radii of room
+    center = QPointF(0.5125 * width, 0.505 * height)
+    radius = min(0.775 * width, 0.77 * height) / 2.2
+    return center, radius, QRectF(center.x() - radius, center.y() - radius, 2 * radius, 2 * radius)
+
+
+def paint_pie(painter, width, height, fracs, colors, mode, checkbox, label_font, labels=None):
+    # labels keeps the laid out label texts for the next call, it has to be used with the same label_font
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.fillRect(QRectF(0, 0, width, height), QColor(facecolor(mode)))
+
+    center, radius, rect = pie_geometry(width, height)
+    fracs, colors, labelled = pie_slices(fracs, colors)
+
+    painter.setPen(QPen(QColor(edgecolor(mode)), 1))
+
+    # startangle=90 and clockwise, Qt counts angles in 1/16th of a degree counterclockwise
+    theta1 = 90.0
+    for frac, color in zip(fracs, colors):
+        span = -360.0 * frac
+        painter.setBrush(QColor(color))
+        painter.drawPie(rect, round(theta1 * 16), round(span * 16))
+        theta1 += span
+
+    if checkbox:
+        painter.setPen(QColor("black"))
+        painter.setFont(label_font)
+        labels = {} if labels is None else labels
+
+        theta1 = 90.0
+        for frac, shown in zip(fracs, labelled):
+            thetam = math.radians(theta1 - 180.0 * frac)
+            theta1 -= 360.0 * frac
+            if not shown:
+                continue
+            text = '%1.1f%%' % (100 * frac)
+            label = labels.get(text)
+            if label is None:
+                label = labels[text] = QStaticText(text)
+                label.setTextFormat(Qt.PlainText)
+                label.prepare(font=label_font)
+            size = label.size()
+            x = center.x() + 0.6 * radius * math.cos(thetam)
+            y = center.y() - 0.6 * radius * math.sin(thetam)
+            painter.drawStaticText(QPointF(x - size.width() / 2, y - size.height() / 2), label)
+
+
+def label_font():
+    # Matplotlib draws the 10pt autopct label at 100 dpi
+    font = QFont()
+    font.setPixelSize(14)
+    return font
+
+
+def rasterize_native(fracs, colors, mode, checkbox, width, height, dpr):
+    image = QImage(round(width * dpr), round(height * dpr), QImage.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+
+    painter = QPainter(image)
+    paint_pie(painter, width, height, fracs, colors, mode, checkbox, label_font())
+    painter.end()
+    return image
+
+
+class NativeRasterizer:
+    # Paints into one QImage that is reused for as long as the size stays the same
+    def __init__(self):
+        self.image = None
+        self.label_font = label_font()
+        self.labels = {}
+
+    def __call__(self, fracs, colors, mode, checkbox, width, height, dpr):
+        size = QSize(round(width * dpr), round(height * dpr))
+        if self.image is None or self.image.size() != size:
+            self.image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+        self.image.setDevicePixelRatio(dpr)
+
+        painter = QPainter(self.image)
+        paint_pie(painter, width, height, fracs, colors, mode, checkbox, self.label_font, self.labels)
+        painter.end()
+        return self.image
+
+
+class NativeChart(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        self.fracs = (0.0, 1.0)
+        self.colors = (DEFAULT_COLOR1, DEFAULT_COLOR2)
+        self.mode = 1
+        self.checkbox = True
+
+        self.label_font = label_font()
+        self.labels = {}
+
+    def update_pie(self, done, tbd, color1, color2, mode, checkbox):
+        self.update_segments((done, tbd), (color1, color2), mode, checkbox)
+
+    def update_segments(self, values, colors, mode, checkbox):
+        style = (tuple(colors), mode, checkbox)
+        changed = style != (self.colors, self.mode, self.checkbox) or len(values) != len(self.fracs)
+        self.fracs = pie_fractions(*values)
+        self.colors, self.mode, self.checkbox = style
+
+        if changed:
+            self.update()
+        else:
+            # Only the wedges and their labels moved, the background around the pie stays as it is
+            rect = pie_geometry(self.width(), self.height())[2]
+            self.update(rect.toAlignedRect().adjusted(-2, -2, 2, 2))
+
+    def paintEvent(self, event):
+        with span("paint"):
+            painter = QPainter(self)
+            paint_pie(painter, self.width(), self.height(), self.fracs, self.colors, self.mode, self.checkbox, self.label_font, self.labels)
+            painter.end()
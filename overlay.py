@@ -0,0 +1,80 @@
+import time
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QTimer, QRectF, QPointF, QPoint
+from PySide6.QtGui import QPainter, QColor, QFont, QPen
+from instrument import recorder
+
+# One frame at 60 Hz, the dashed line in the plot
+FRAME_BUDGET_MS = 1000 / 60
+HISTORY = 60
+
+
+class FrameOverlay(QWidget):
+    def __init__(self, window):
+        super().__init__(window.main_widget)
+        self.main_window = window
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.resize(2 * HISTORY + 16, 64)
+
+        self.font = QFont()
+        self.font.setPixelSize(10)
+
+        # Reading the recorder a few times a second is plenty, and costs nothing while hidden
+        self.timer = QTimer(self)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+        else:
+            recorder.enabled = True
+            self.refresh()
+            self.show()
+            self.timer.start()
+
+    def set_idle(self, idle):
+        # Nothing to plot while the window is away
+        if not self.isVisible():
+            return
+        if idle:
+            self.timer.stop()
+        else:
+            self.timer.start()
+
+    def refresh(self):
+        # The canvas moves between the layouts, stay in its top left corner
+        self.move(self.main_window.canvas.geometry().topLeft() + QPoint(4, 4))
+        self.raise_()
+        self.update()
+
+    def paintEvent(self, event):
+        # Redraw plus paint, for the native and the threaded chart the paint is most of the frame
+        frames = recorder.frames(HISTORY)
+        since = time.perf_counter() - 1.0
+        rate = sum(end >= since for end, _ in frames)
+        frames = [ms for _, ms in frames]
+
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 160))
+        painter.setFont(self.font)
+        painter.setPen(QColor("white"))
+        last = frames[-1] if frames else 0.0
+        worst = max(frames, default=0.0)
+        painter.drawText(QRectF(6, 2, self.width() - 12, 14), Qt.AlignLeft | Qt.AlignVCenter, f"{last:.1f} ms  max {worst:.1f}  {rate:.0f}/s")
+
+        # One bar per frame, scaled so the budget line stays visible
+        plot = QRectF(8, 18, self.width() - 16, self.height() - 24)
+        scale = plot.height() / max(2 * FRAME_BUDGET_MS, worst)
+        budget = plot.bottom() - FRAME_BUDGET_MS * scale
+        painter.setPen(QPen(QColor(255, 255, 255, 90), 1, Qt.DashLine))
+        painter.drawLine(QPointF(plot.left(), budget), QPointF(plot.right(), budget))
+
+        for i, ms in enumerate(frames):
+            color = QColor("#56CA3D") if ms <= FRAME_BUDGET_MS else QColor("#CA3D3D")
+            height = max(1.0, ms * scale)
+            painter.fillRect(QRectF(plot.left() + 2 * i, plot.bottom() - height, 1.5, height), color)
+
+        painter.end()
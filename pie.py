@@ -1,10 +1,91 @@
+import time
+start = time.perf_counter()
+
 from PySide6.QtWidgets import QApplication
-from mainwindow import MainWindow
+from mainwindow import MainWindow, RENDERERS
+from startup import StartupProfile
+from animation import EASINGS
+import argparse
 import sys
 
-app = QApplication(sys.argv)
+parser = argparse.ArgumentParser()
+parser.add_argument("--renderer", choices=RENDERERS, default="matplotlib", help="pie chart renderer (native skips matplotlib entirely)")
+parser.add_argument("--max-fps", type=int, default=30, help="upper bound on chart redraws per second while typing")
+parser.add_argument("--debounce", type=int, default=0, metavar="MS", help="wait this long after an edit before redrawing")
+parser.add_argument("--cache-mb", type=int, default=0, help="keep rendered pies in an LRU cache of this many MB (0 disables it)")
+parser.add_argument("--control", metavar="NAME", help="accept line-delimited JSON progress updates on this local socket")
+parser.add_argument("--threaded", action="store_true", help="rasterize the chart on a worker thread (takes precedence over --cache-mb)")
+parser.add_argument("--dashboard", action="store_true", help="show every tracker pushed through --control in one grid window")
+parser.add_argument("--fast-resize", action="store_true", help="stretch the last frame while the window is being resized and render at the new size once it settles")
+parser.add_argument("--fast-start", action="store_true", help="show the window first and load the chart renderer after the first paint")
+parser.add_argument("--startup-profile", action="store_true", help="print how long each startup phase took")
+parser.add_argument("--watch-dir", metavar="PATH", help="take current from the number of files in this directory")
+parser.add_argument("--watch-log", metavar="PATH", help="take current from the lines appended to this log file")
+parser.add_argument("--watch-shm", metavar="PATH", help="sum the counters that worker processes bump through sharedcounters.Counter(PATH), sampled every frame")
+parser.add_argument("--stdin", action="store_true", help="follow progress printed to stdin as N/M, a percentage or a tqdm bar (tqdm writes to stderr, pipe it with 2>&1)")
+parser.add_argument("--match", metavar="PATTERN", help="only count files matching this glob (--watch-dir) or lines matching this regex (--watch-log); named groups current and total are used as values")
+parser.add_argument("--total", type=float, help="total for --watch-dir, --watch-log, --watch-shm or --stdin, otherwise the typed-in total is kept")
+parser.add_argument("--http", type=int, metavar="PORT", help="serve the chart as /chart.png and /chart.svg (?w=&h=) and the state as /state.json on localhost:PORT")
+parser.add_argument("--record", metavar="FILE", help="append typed values, layout toggles, settings and mode changes to FILE, play it back with replay.py")
+parser.add_argument("--instrument", action="store_true", help="time every stage of a redraw, layout toggle and theme switch, print the histograms on exit")
+parser.add_argument("--trace", metavar="FILE", help="write the recorded spans to FILE as a Chrome trace on exit (implies --instrument)")
+parser.add_argument("--animate", type=int, default=0, metavar="MS", help="sweep the pie to each new value over this many milliseconds (0 jumps straight to it)")
+parser.add_argument("--easing", choices=EASINGS, default="OutCubic", help="easing curve of --animate")
+args, qt_args = parser.parse_known_args()
+if args.max_fps < 1:
+    parser.error("--max-fps must be at least 1")
+if args.dashboard and not args.control:
+    parser.error("--dashboard needs --control NAME, trackers only arrive through the control socket")
+if args.dashboard:
+    # The dashboard only takes --max-fps and --control, anything meant for the single pie window would be ignored
+    ignored = []
+    for flag in ("--renderer", "--debounce", "--cache-mb", "--threaded", "--fast-resize", "--fast-start", "--startup-profile", "--watch-dir", "--watch-log", "--watch-shm", "--stdin", "--match", "--total", "--http", "--record", "--animate", "--easing"):
+        dest = flag[2:].replace("-", "_")
+        if getattr(args, dest) != parser.get_default(dest):
+            ignored.append(flag)
+    if ignored:
+        parser.error(f"{', '.join(ignored)} can't be used with --dashboard")
+
+profile = StartupProfile(start) if args.startup_profile else None
+if profile:
+    profile.mark("imports")
+
+app = QApplication(sys.argv[:1] + qt_args)
+if profile:
+    profile.mark("QApplication")
 
-window = MainWindow()
+if args.instrument or args.trace:
+    from instrument import recorder
+    recorder.enabled = True
+
+source = None
+if args.watch_dir:
+    from sources import DirectorySource
+    source = DirectorySource(args.watch_dir, args.match, args.total)
+elif args.watch_log:
+    from sources import LogSource
+    source = LogSource(args.watch_log, args.match, args.total)
+elif args.stdin:
+    from sources import StreamSource
+    source = StreamSource(sys.stdin.buffer, args.total, 1000 // args.max_fps)
+elif args.watch_shm:
+    from sources import SharedCountersSource
+    source = SharedCountersSource(args.watch_shm, args.total, 1000 // args.max_fps)
+
+if args.dashboard:
+    from dashboard import DashboardWindow
+    window = DashboardWindow(max_fps=args.max_fps, control=args.control)
+else:
+    window = MainWindow(renderer=args.renderer, max_fps=args.max_fps, debounce_ms=args.debounce, cache_mb=args.cache_mb, control=args.control, fast_start=args.fast_start, profile=profile, threaded=args.threaded, source=source, animate_ms=args.animate, easing=args.easing, http=args.http, fast_resize=args.fast_resize, record=args.record)
 window.show()
+if args.http is not None:
+    print(f"Serving the chart on http://127.0.0.1:{window.chart_server.port}/chart.png", file=sys.stderr)
+if profile:
+    profile.mark("show")
 
 app.exec()
+
+if args.instrument or args.trace:
+    recorder.report()
+    if args.trace:
+        recorder.dump_trace(args.trace)
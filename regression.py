@@ -0,0 +1,200 @@
+import os
+import re
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEvent, QTimer
+from mainwindow import MainWindow
+from measure import rss_kb, percentile
+
+# Below these differences a metric is noise on a shared machine, whatever the percentage says
+NOISE = {"ms": 0.5, "kb": 2048}
+
+
+def latency(metrics, name, times):
+    for p in (50, 95, 99):
+        metrics[f"{name}.p{p}_ms"] = round(percentile(times, p), 3)
+    metrics[f"{name}.max_ms"] = round(max(times), 3)
+
+
+def timed(app, action):
+    # An entry point is done once the events it posted (repaints, deferred deletes) are handled
+    start = time.perf_counter()
+    action()
+    app.processEvents()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_update_chart(app, metrics, count):
+    for renderer in ("matplotlib", "native"):
+        window = MainWindow(renderer=renderer)
+        window.show()
+        app.processEvents()
+
+        times = []
+        for i in range(count):
+            window.input2_edit.setText(str(i % 5))
+            times.append(timed(app, window.update_chart))
+        latency(metrics, f"update_chart.{renderer}", times)
+        window.close()
+
+
+def bench_toggle_layout(app, metrics, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    times = [timed(app, window.toggle_layout) for _ in range(count)]
+    latency(metrics, "toggle_layout", times)
+    window.close()
+
+
+def bench_set_mode(app, metrics, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    times = [timed(app, lambda: window.set_mode(i % 2)) for i in range(count)]
+    latency(metrics, "set_mode", times)
+    window.close()
+
+
+def bench_open_settings(app, metrics, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    # open_settings runs the dialog modally, close it as soon as its event loop starts
+    times = []
+    for _ in range(count):
+        QTimer.singleShot(0, lambda: window.settings_window.reject())
+        times.append(timed(app, window.open_settings))
+    metrics["open_settings.first_ms"] = round(times[0], 3)
+    latency(metrics, "open_settings", times[1:])
+    window.close()
+
+
+def bench_memory(app, metrics, count):
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+
+    # Steady state is what the process settles at after the same work was done many times over
+    for _ in range(count):
+        timed(app, window.toggle_layout)
+        window.set_mode(window.theme ^ 1)
+    gc.collect()
+    settled = rss_kb()
+    for _ in range(count):
+        timed(app, window.toggle_layout)
+        window.set_mode(window.theme ^ 1)
+    gc.collect()
+
+    metrics["memory.steady_kb"] = rss_kb()
+    metrics["memory.growth_kb"] = max(0, rss_kb() - settled)
+    metrics["memory.peak_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    window.close()
+
+
+def startup_time(args):
+    # Wall time from launching pie.py until its startup profile is printed after the first paint
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(here, "pie.py"), "--startup-profile"] + args, cwd=here, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    profiled = None
+    for line in process.stderr:
+        match = re.match(r"\s+total\s+([\d.]+) ms", line)
+        if match:
+            elapsed = (time.perf_counter() - start) * 1000
+            profiled = float(match.group(1))
+            break
+    process.kill()
+    process.wait()
+    if profiled is None:
+        raise RuntimeError(f"pie.py {' '.join(args)} exited without a startup profile")
+    return elapsed, profiled
+
+
+def bench_startup(metrics, runs):
+    for name, args in (("matplotlib", []), ("native", ["--renderer", "native"]), ("fast_start", ["--fast-start"])):
+        times = [startup_time(args) for _ in range(runs)]
+        metrics[f"startup.{name}.wall_ms"] = round(percentile([wall for wall, _ in times], 50), 1)
+        metrics[f"startup.{name}.profile_ms"] = round(percentile([profiled for _, profiled in times], 50), 1)
+
+
+def compare(metrics, baseline, threshold):
+    # Every metric is lower-is-better, a regression has to beat both the threshold and the noise floor
+    regressions = []
+    for name, before in sorted(baseline.items()):
+        after = metrics.get(name)
+        if after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        noisy = after - before < NOISE[name.rsplit("_", 1)[1]]
+        failed = change > threshold and not noisy
+        print(f"  {name:36} {before:10.2f} -> {after:10.2f}  {change:+6.1f}%{'  REGRESSION' if failed else ''}")
+        if failed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time PIE's GUI entry points headless and compare them against a baseline")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=25.0, metavar="PCT", help="fail when a metric got this many percent worse than the baseline")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per entry point")
+    parser.add_argument("--startup-runs", type=int, default=5, help="pie.py launches per startup variant")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+
+    metrics = {}
+    bench_update_chart(app, metrics, args.iterations)
+    bench_toggle_layout(app, metrics, args.iterations)
+    bench_set_mode(app, metrics, args.iterations)
+    bench_open_settings(app, metrics, max(2, args.iterations // 10))
+    bench_memory(app, metrics, args.iterations)
+    bench_startup(metrics, args.startup_runs)
+
+    results = {
+        "python": platform.python_version(),
+        "pyside6": PySide6.__version__,
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "metrics": metrics,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if not args.baseline:
+        for name, value in metrics.items():
+            print(f"  {name:36} {value:10.2f}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["metrics"]
+    print(f"compared with {args.baseline} (threshold {args.threshold:g}%)")
+    regressions = compare(metrics, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
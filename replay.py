@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEvent, QEventLoop, QTimer
+from mainwindow import MainWindow, RENDERERS
+from sessionlog import read_sessions
+from instrument import recorder
+from measure import percentile
+
+# The recorded options that shape the window, the rest of the header only describes the machine it ran on
+WINDOW_OPTIONS = ("renderer", "max_fps", "debounce_ms", "cache_mb", "threaded", "animate_ms", "easing", "fast_resize")
+
+# A typed value that is still not drawn after this long counts as drawn, so a broken replay can't hang
+FLUSH_TIMEOUT_MS = 5000
+
+
+class Replayer:
+    def __init__(self, app, window):
+        self.app = app
+        self.window = window
+        self.loop = QEventLoop()
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.loop.quit)
+
+        # Typed values are drawn later by the scheduler, its callback says when the frame is there
+        self.drawing = 0.0
+        draw = window.scheduler.callback
+
+        def drawn(*values):
+            begin = time.perf_counter()
+            draw(*values)
+            self.drawing += time.perf_counter() - begin
+            self.loop.quit()
+
+        window.scheduler.callback = drawn
+
+    def wait(self, ms):
+        self.timer.start(max(0, round(ms)))
+        self.loop.exec()
+        self.timer.stop()
+
+    def dispatch(self, kind, args):
+        # The same entry points the widgets and signals call, without the modal settings dialog
+        window = self.window
+        if kind == "edit":
+            window.input1_edit.setText(args[0])
+            window.input2_edit.setText(args[1])
+            window.input_edited()
+        elif kind == "toggle":
+            window.toggle_layout()
+        elif kind == "mode":
+            window.set_mode(args[0])
+        elif kind == "settings":
+            window.handle_settings_saved(*args)
+        elif kind == "remote":
+            window.apply_remote_state(args[0])
+
+    def play(self, events, realtime=True):
+        # [(ms, kind, latency_ms, busy_ms), ...], an event is done once the frame showing it is drawn and painted
+        # Busy leaves out the time spent waiting for the scheduler's next frame, it is what the event cost the GUI thread
+        results = []
+        start = time.perf_counter()
+        for ms, kind, args in events:
+            if realtime:
+                self.wait(ms - (time.perf_counter() - start) * 1000)
+
+            begin = time.perf_counter()
+            self.dispatch(kind, args)
+            dispatched = time.perf_counter()
+            self.drawing = 0.0
+            if self.window.scheduler.pending is not None:
+                self.wait(FLUSH_TIMEOUT_MS)
+            settle = time.perf_counter()
+            self.app.processEvents()
+            self.app.sendPostedEvents(None, QEvent.DeferredDelete)
+            end = time.perf_counter()
+            results.append((ms, kind, (end - begin) * 1000, (dispatched - begin + self.drawing + end - settle) * 1000))
+        return results
+
+
+def summary(results):
+    kinds = {}
+    for _, kind, latency, busy in results:
+        kinds.setdefault(kind, []).append((latency, busy))
+    rows = {}
+    for kind, times in kinds.items():
+        latencies = [latency for latency, _ in times]
+        busy = [busy for _, busy in times]
+        rows[kind] = {
+            "count": len(times),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "max_ms": round(max(latencies), 3),
+            "busy_p50_ms": round(percentile(busy, 50), 3),
+            "busy_p95_ms": round(percentile(busy, 95), 3),
+        }
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a session recorded with pie.py --record back in a headless window and time every event")
+    parser.add_argument("log", help="file written by pie.py --record")
+    parser.add_argument("--session", type=int, default=-1, help="which session of the file to play, the last one by default")
+    parser.add_argument("--max-speed", action="store_true", help="play each event as soon as the previous one is drawn instead of at its recorded time")
+    parser.add_argument("--renderer", choices=RENDERERS, help="play against this renderer instead of the recorded one")
+    parser.add_argument("--slowest", type=int, default=5, help="list this many of the slowest events")
+    parser.add_argument("-o", "--output", help="write every event's latency and the summary to this JSON file")
+    parser.add_argument("--instrument", action="store_true", help="also time every stage of the redraws, print the histograms at the end")
+    parser.add_argument("--trace", metavar="FILE", help="write the recorded spans to FILE as a Chrome trace (implies --instrument)")
+    args = parser.parse_args()
+
+    sessions = read_sessions(args.log)
+    if not sessions:
+        sys.exit(f"{args.log} has no recorded session")
+    try:
+        options, events = sessions[args.session]
+    except IndexError:
+        sys.exit(f"{args.log} has {len(sessions)} session(s), there is no session {args.session}")
+
+    window_options = {name: options[name] for name in WINDOW_OPTIONS if name in options}
+    if args.renderer:
+        window_options["renderer"] = args.renderer
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow(**window_options)
+    window.show()
+    replayer = Replayer(app, window)
+    replayer.wait(200)
+
+    recorder.enabled = bool(args.instrument or args.trace)
+    recorder.clear()
+    start = time.perf_counter()
+    results = replayer.play(events, realtime=not args.max_speed)
+    elapsed = time.perf_counter() - start
+    window.close()
+
+    rows = summary(results)
+    recorded = events[-1][0] / 1000 if events else 0.0
+    print(f"{len(results)} events of session {args.session % len(sessions)} ({options.get('started', '?')}, {options.get('platform', '?')}, dpr {options.get('dpr', '?')})")
+    print(f"played in {elapsed:.2f} s ({recorded:.2f} s recorded) on {window_options.get('renderer', 'matplotlib')}")
+    for kind, row in rows.items():
+        print(f"  {kind:<8}  {row['count']:6} x  p50 {row['p50_ms']:7.2f} ms  p95 {row['p95_ms']:7.2f} ms  max {row['max_ms']:7.2f} ms  busy p50 {row['busy_p50_ms']:7.2f} ms  p95 {row['busy_p95_ms']:7.2f} ms")
+
+    if args.slowest and results:
+        print("slowest:")
+        for index, (ms, kind, latency, busy) in sorted(enumerate(results), key=lambda item: -item[1][2])[:args.slowest]:
+            print(f"  #{index:<5} at {ms / 1000:8.3f} s  {kind:<8}  {latency:7.2f} ms  busy {busy:7.2f} ms")
+
+    if recorder.enabled:
+        recorder.report(sys.stdout)
+        if args.trace:
+            recorder.dump_trace(args.trace)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"session": options, "summary": rows, "events": [{"ms": ms, "kind": kind, "latency_ms": round(latency, 3), "busy_ms": round(busy, 3)} for ms, kind, latency, busy in results]}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import time
+from PySide6.QtCore import QObject, QTimer
+
+
+def parse_inputs(total_text, current_text):
+    # Returns (total, current) or None when the pair can't be drawn (empty, half typed, out of range)
+    try:
+        total = float(total_text)
+        current = float(current_text)
+    except ValueError:
+        return None
+
+    if not 0 < total < float("inf") or not 0 <= current <= total:
+        return None
+    return total, current
+
+
+def format_input(value, width=None):
+    # Shortest text that parses back to the same value, so refilling a field never moves the pie
+    text = repr(float(value))
+    text = text[:-2] if text.endswith(".0") else text
+
+    # A field too narrow for it shows the value rounded to the digits that fit instead of cut off
+    if width is not None and len(text) > width:
+        for digits in range(width, 0, -1):
+            mantissa, e, exponent = f"{float(value):.{digits}g}".partition("e")
+            short = f"{mantissa}e{int(exponent)}" if e else mantissa
+            if len(short) <= width:
+                return short
+    return text
+
+
+class UpdateScheduler(QObject):
+    def __init__(self, callback, max_fps=30, debounce_ms=0, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self.interval = 1.0 / max_fps
+        self.debounce = debounce_ms / 1000
+        self.pending = None
+        self.last_render = 0.0
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.rendered = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def submit_text(self, total_text, current_text):
+        values = parse_inputs(total_text, current_text)
+        if values is None:
+            self.submitted += 1
+            self.dropped += 1
+            return
+        self.submit(*values)
+
+    def submit(self, total, current):
+        self.submitted += 1
+
+        # Only the latest pair is kept, the one already waiting is replaced
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = (total, current)
+
+        # A debounce waits for a pause in the edits, every new edit starts it over
+        if self.debounce or not self.timer.isActive():
+            delay = max(self.debounce, self.last_render + self.interval - time.monotonic())
+            self.timer.start(max(0, round(delay * 1000)))
+
+    def cancel(self):
+        self.timer.stop()
+        self.pending = None
+
+    def flush(self):
+        self.timer.stop()
+        if self.pending is None:
+            return
+
+        values = self.pending
+        self.pending = None
+        self.last_render = time.monotonic()
+        self.rendered += 1
+        self.callback(*values)
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "rendered": self.rendered,
+        }
+
+
+class ResizeGate(QObject):
+    # Tells a chart whether a resize is part of an interactive drag, settle runs once the size stops changing
+    def __init__(self, settle, delay_ms=150, parent=None):
+        super().__init__(parent)
+        self.settle = settle
+        self.previewed = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.finish)
+
+    def resized(self):
+        # A lone resize (layout toggle, maximize) renders right away, only the ones quickly following it are previews
+        preview = self.timer.isActive()
+        self.previewed = self.previewed or preview
+        self.timer.start()
+        return preview
+
+    def finish(self):
+        if self.previewed:
+            self.previewed = False
+            self.settle()
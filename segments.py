@@ -0,0 +1,55 @@
+import math
+from PySide6.QtGui import QColor
+
+# Colors for segments defined without one, or only ever seen in pushed data
+PALETTE = ("#888888", "#3D8BCA", "#CA3D3D", "#56CA3D", "#CAB23D", "#8B3DCA", "#3DCAB2", "#CA7A3D")
+EXAMPLE = "queued #888888, running #3D8BCA, failed #CA3D3D, done #56CA3D"
+
+# The segment that counts as current for the inputs, the history and the ETA
+DONE = "done"
+
+
+def parse_segments(text):
+    # "queued #888888, running, done #56CA3D" -> [(name, color), ...], None when a color or name is not usable
+    segments = []
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, _, color = item.strip().partition(" ")
+        color = color.strip() or PALETTE[len(segments) % len(PALETTE)]
+        if not QColor.isValidColorName(color) or name in dict(segments):
+            return None
+        segments.append((name, color))
+    return segments
+
+
+def format_segments(segments):
+    return ", ".join(f"{name} {color}" for name, color in segments)
+
+
+def read_segments(values, labels=None, names=()):
+    # Pushed segment values, {"queued": 10, "done": 30} or [10, 30] named by labels or else by the defined names in order
+    # -> {name: value}, None unless every value is a finite non-negative number and they add up to more than 0
+    if isinstance(values, dict):
+        labels, values = list(values), list(values.values())
+    if not isinstance(values, list) or (labels is not None and (not isinstance(labels, list) or len(labels) != len(values))):
+        return None
+    if labels is None:
+        labels = [names[i] if i < len(names) else f"segment {i + 1}" for i in range(len(values))]
+
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    values = [float(value) for value in values]
+    labels = [str(label) for label in labels]
+    if not all(math.isfinite(value) and value >= 0 for value in values) or not sum(values) > 0 or len(set(labels)) != len(labels):
+        return None
+    return dict(zip(labels, values))
+
+
+def resolve_segments(segments, values):
+    # Defined segments keep their order and color (0 when not reported), names only seen in the data are appended
+    colors = dict(segments)
+    names = [name for name, _ in segments] + [name for name in values if name not in colors]
+    for name in names[len(segments):]:
+        colors[name] = PALETTE[names.index(name) % len(PALETTE)]
+    return tuple(names), tuple(float(values.get(name, 0)) for name in names), tuple(colors[name] for name in names)
@@ -0,0 +1,56 @@
+import json
+import time
+
+# pie.py --record FILE appends one JSON array per line, milliseconds since the session started first:
+#
+#   [0, "session", {"renderer": "matplotlib", "max_fps": 30, ...}]
+#   [812, "edit", "40", "12"]              both fields after a typed change
+#   [1930, "toggle"]                       main <-> mini layout
+#   [2544, "mode", 0]                      theme slider in the settings
+#   [3010, "settings", "#56CA3D", "#CA3D3D", true, 0, ""]
+#   [4022, "remote", {"current": 13}]      state pushed through --control or a watched source
+#
+# Every session starts with its own header, one file can collect several of them
+VERSION = 1
+KINDS = ("edit", "toggle", "mode", "settings", "remote")
+
+
+class SessionLog:
+    def __init__(self, path, options):
+        # Line buffered and opened for appending, a crash loses at most the event being written
+        self.file = open(path, "a", buffering=1)
+
+        # A line torn by such a crash is ended first, otherwise it would swallow this session's header
+        if self.file.tell() and not ends_with_newline(path):
+            self.file.write("\n")
+        self.start = time.perf_counter()
+        self.write("session", dict(options, version=VERSION, started=time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    def write(self, kind, *args):
+        event = [round((time.perf_counter() - self.start) * 1000), kind, *args]
+        self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+def read_sessions(path):
+    # [(options, [(ms, kind, args), ...]), ...] in recording order, a torn last line is skipped
+    sessions = []
+    with open(path) as f:
+        for line in f:
+            try:
+                ms, kind, *args = json.loads(line)
+            except ValueError:
+                continue
+            if kind == "session":
+                sessions.append((args[0], []))
+            elif sessions and kind in KINDS:
+                sessions[-1][1].append((ms, kind, args))
+    return sessions
@@ -0,0 +1,153 @@
+import os
+import mmap
+import tempfile
+from array import array
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Producer side of a --watch-shm file, plain Python without Qt so worker processes can import it cheaply:
+#
+#   from sharedcounters import Counter
+#   with Counter("/tmp/job.pie", total=len(items)) as progress:
+#       for item in items:
+#           work(item)
+#           progress.add()
+#
+# The first Counter creates the file, create(path) starts the next job over with a fresh one
+#
+# The file is a header and one slot per producer, each made of 8 int64 words so two writers never share a cache line
+#   header: magic, version, slots, claimed
+#   slot:   seq, current, total, pid
+MAGIC = int.from_bytes(b"PIECNTRS", "little")
+VERSION = 1
+WORDS = 8
+DEFAULT_SLOTS = 256
+
+# A writer killed between the two seq bumps leaves its slot odd forever, take its values after this many tries
+RETRIES = 100
+
+
+def create(path, slots=DEFAULT_SLOTS, exist_ok=False):
+    # A fresh zeroed file per job, moved into place so a reader never maps half a header
+    # With exist_ok an existing file is kept, producers racing to create it end up sharing the one that got there first
+    if exist_ok and os.path.exists(path):
+        return
+    words = array("q", bytes(8 * WORDS * (slots + 1)))
+    words[:4] = array("q", (MAGIC, VERSION, slots, 0))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            words.tofile(f)
+        if not exist_ok:
+            os.replace(tmp, path)
+            return
+        # Unlike a rename, a link fails when the name is already taken
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def open_counters(path, writable=False):
+    # The mapping and an int64 view of it, ValueError for a file that is not a counter file
+    with open(path, "r+b" if writable else "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    words = memoryview(mapping).cast("q")
+    if len(words) < WORDS or words[0] != MAGIC or words[1] != VERSION or len(words) < WORDS * (words[2] + 1):
+        words.release()
+        mapping.close()
+        raise ValueError(f"{path} is not a progress counter file")
+    return mapping, words
+
+
+def close_counters(mapping, words):
+    words.release()
+    mapping.close()
+
+
+def sample(words):
+    # Sums every claimed slot, no locks: each slot is re-read until its seq is even and did not move meanwhile
+    current = total = 0
+    for slot in range(min(words[3], words[2])):
+        base = WORDS * (slot + 1)
+        for _ in range(RETRIES):
+            seq = words[base]
+            values = words[base + 1], words[base + 2]
+            if not seq & 1 and words[base] == seq:
+                break
+        current += values[0]
+        total += values[1]
+    return current, total
+
+
+class Counter:
+    # One producer, the only writer of its slot, so its own values never have to be read back
+    # The first producer creates the file with room for slots producers, the others use it as it is
+    def __init__(self, path, total=0, slot=None, slots=DEFAULT_SLOTS):
+        create(path, slots, exist_ok=True)
+        self.mapping, self.words = open_counters(path, writable=True)
+        if slot is None:
+            slot = self.claim(path)
+        if not 0 <= slot < self.words[2]:
+            self.close()
+            raise ValueError(f"slot {slot} is outside of the {self.words[2]} slots of {path}")
+
+        self.base = WORDS * (slot + 1)
+        self.seq = self.words[self.base]
+        self.current = self.words[self.base + 1]
+        self.total = self.words[self.base + 2]
+        self.words[self.base + 3] = os.getpid()
+        if total:
+            self.set(total=total)
+
+    def claim(self, path):
+        # Slots are handed out in order and never reused, a finished producer's count stays in the sum
+        if fcntl is None:
+            raise RuntimeError("pass slot= explicitly, this platform has no flock")
+        with open(path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                slot = self.words[3]
+                self.words[3] = slot + 1
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        if slot >= self.words[2]:
+            self.close()
+            raise RuntimeError(f"all {self.words[2]} slots of {path} are taken")
+        return slot
+
+    def add(self, count=1):
+        self.current += count
+        self.write()
+
+    def set(self, current=None, total=None):
+        if current is not None:
+            self.current = int(current)
+        if total is not None:
+            self.total = int(total)
+        self.write()
+
+    def write(self):
+        # Seqlock: odd while the values change, every store is one aligned 8 byte write
+        words, base = self.words, self.base
+        self.seq += 1
+        words[base] = self.seq
+        words[base + 1] = self.current
+        words[base + 2] = self.total
+        self.seq += 1
+        words[base] = self.seq
+
+    def close(self):
+        close_counters(self.mapping, self.words)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,329 @@
+import os
+import re
+import time
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# A log line longer than this is cut, a runaway writer must not grow the buffer forever
+MAX_LINE = 64 * 1024
+READ_SIZE = 1024 * 1024
+
+# "45/100", "1.20k/3.40k" (tqdm with unit_scale) and "45%", not dates like 10/18/2026 or rates like 12MB/s
+FRACTION = re.compile(rb"(?<![\d./])(\d+(?:\.\d+)?)([kMGT]?)\s*/\s*(\d+(?:\.\d+)?)([kMGT]?)(?![\d./])")
+PERCENT = re.compile(rb"(?<![\d.])(\d+(?:\.\d+)?)\s*%")
+SCALE = {b"": 1, b"k": 1e3, b"M": 1e6, b"G": 1e9, b"T": 1e12}
+
+# Filesystems with coarse timestamps can change a directory twice within one mtime tick
+MTIME_SLACK_NS = 2 * 10**9
+
+
+class DirectorySource:
+    # current is the number of files in a directory (matching a glob), total is fixed or typed in
+    def __init__(self, path, pattern=None, total=None):
+        self.path = path
+        self.pattern = pattern
+        self.total = total
+        self.mtime = None
+        self.count = 0
+
+    def poll(self):
+        # Adding, removing or renaming an entry bumps the directory mtime, skip the listing otherwise
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self.mtime and time.time_ns() - mtime > MTIME_SLACK_NS:
+            return None
+        self.mtime = mtime
+
+        count = 0
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                # d_type from the listing, no stat per file
+                if entry.is_file() and (self.pattern is None or fnmatch(entry.name, self.pattern)):
+                    count += 1
+
+        if count == self.count:
+            return None
+        self.count = count
+        return self.state()
+
+    def state(self):
+        state = {"current": self.count}
+        if self.total is not None:
+            state["total"] = self.total
+        return state
+
+
+class LogSource:
+    # current counts appended lines (matching a regex), or comes from a current/total group in the last match
+    def __init__(self, path, pattern=None, total=None):
+        self.path = path
+        self.regex = re.compile(pattern.encode()) if pattern else None
+        self.total = total
+        self.inode = None
+        self.offset = 0
+        self.buffer = b""
+        self.count = 0
+        self.values = {}
+
+    def poll(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # Rotated or truncated, start over from the beginning of the new file
+            self.inode = stat.st_ino
+            self.offset = 0
+            self.buffer = b""
+            self.count = 0
+            self.values = {}
+        if stat.st_size == self.offset:
+            return None
+
+        # Only the bytes appended since the last poll are read
+        changed = False
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                data = f.read(READ_SIZE)
+                if not data:
+                    break
+                self.offset += len(data)
+                *lines, self.buffer = (self.buffer + data).split(b"\n")
+                self.buffer = self.buffer[-MAX_LINE:]
+                changed = self.scan(lines) or changed
+
+        return self.state() if changed else None
+
+    def scan(self, lines):
+        if self.regex is None:
+            self.count += len(lines)
+            return bool(lines)
+
+        if not self.regex.groupindex:
+            matched = sum(1 for line in lines if self.regex.search(line))
+            self.count += matched
+            return matched > 0
+
+        # "step (?P<current>\d+)/(?P<total>\d+)" style patterns report the numbers themselves, only the newest match counts
+        for line in reversed(lines):
+            match = self.regex.search(line)
+            if match is not None:
+                self.values.update((name, float(value)) for name, value in match.groupdict().items() if name in ("current", "total") and value is not None)
+                return True
+        return False
+
+    def state(self):
+        state = {"current": self.count}
+        if self.total is not None:
+            state["total"] = self.total
+        state.update(self.values)
+        return state
+
+
+class SharedCountersSource:
+    # current and total summed over the producer slots of a sharedcounters file, cheap enough to sample every frame
+    def __init__(self, path, total=None, min_interval=100):
+        self.path = path
+        self.total = total
+        self.min_interval = min_interval
+        self.inode = None
+        self.mapping = None
+        self.words = None
+        self.values = None
+
+    def poll(self):
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            return None
+
+        if inode != self.inode:
+            # A new job replaced the file, map the new one
+            from sharedcounters import open_counters
+            self.close()
+            try:
+                self.mapping, self.words = open_counters(self.path)
+            except (OSError, ValueError):
+                return None
+            self.inode = inode
+            self.values = None
+
+        from sharedcounters import sample
+        values = sample(self.words)
+        if values == self.values:
+            return None
+        self.values = values
+        return self.state()
+
+    def state(self):
+        current, total = self.values
+        state = {"current": current}
+        if self.total is not None:
+            state["total"] = self.total
+        elif total:
+            state["total"] = total
+        return state
+
+    def close(self):
+        if self.mapping is not None:
+            from sharedcounters import close_counters
+            close_counters(self.mapping, self.words)
+            self.inode = self.mapping = self.words = None
+
+
+def parse_progress(record):
+    # (current, total) from one line or \r-separated tqdm refresh, None when it holds no usable progress
+    match = FRACTION.search(record)
+    if match is not None:
+        current = float(match[1]) * SCALE[match[2]]
+        total = float(match[3]) * SCALE[match[4]]
+    else:
+        match = PERCENT.search(record)
+        if match is None:
+            return None
+        current, total = float(match[1]), 100.0
+
+    if not 0 <= current <= total or total <= 0:
+        return None
+    return current, total
+
+
+def last_progress(data):
+    # Only the newest value matters, walk the records back from the end until one parses
+    end = len(data)
+    while end > 0:
+        start = max(data.rfind(b"\n", 0, end), data.rfind(b"\r", 0, end)) + 1
+        values = parse_progress(data[start:end])
+        if values is not None:
+            return values
+        end = start - 1
+    return None
+
+
+class StreamSource:
+    # current/total from progress text piped in (N/M, tqdm bars, percentages), read and parsed on its own thread
+    def __init__(self, stream, total=None, min_interval=100):
+        self.fd = stream.fileno()
+        self.total = total
+        self.min_interval = min_interval
+        self.latest = None
+        self.shown = None
+        self.bytes = 0
+        self.eof = False
+
+        # Daemon, a blocking read must not keep the application from quitting
+        self.thread = threading.Thread(target=self.run, name="pie-stream", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        # Everything but the newest parsed value and one partial record is dropped right away
+        buffer = b""
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except OSError:
+                data = b""
+            if not data:
+                self.latest = last_progress(buffer) or self.latest
+                self.eof = True
+                return
+
+            self.bytes += len(data)
+            data = buffer + data
+            end = max(data.rfind(b"\n"), data.rfind(b"\r"))
+            buffer = data[end + 1:][-MAX_LINE:]
+            if end >= 0:
+                self.latest = last_progress(data[:end]) or self.latest
+
+    def poll(self):
+        # Runs at frame rate at most, intermediate values the reader parsed meanwhile are skipped
+        latest = self.latest
+        if latest is None or latest == self.shown:
+            return None
+        self.shown = latest
+        return self.state()
+
+    def state(self):
+        current, total = self.shown
+        return {"current": current, "total": total if self.total is None else self.total}
+
+
+class SourceWatcher(QObject):
+    state_received = Signal(dict)
+    polled = Signal(object)
+
+    def __init__(self, source, min_interval=100, max_interval=2000, idle_interval=10000, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.min_interval = min_interval
+        self.active_interval = max_interval
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.polls = 0
+        self.changes = 0
+        self.stopped = False
+
+        # Disk I/O runs on a worker, the GUI thread only schedules polls and applies their results
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pie-source")
+        self.polled.connect(self.apply)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.poll)
+        self.poll()
+
+    def poll(self):
+        self.executor.submit(self.run)
+
+    def run(self):
+        # Runs on the worker thread
+        try:
+            state = self.source.poll()
+        except OSError:
+            state = None
+        try:
+            self.polled.emit(state)
+        except RuntimeError:
+            # The watcher went away while the source was read
+            pass
+
+    def apply(self, state):
+        self.polls += 1
+        if self.stopped:
+            return
+
+        # Poll fast while things move, back off to max_interval while they don't
+        if state is None:
+            self.interval = min(self.max_interval, self.interval * 2)
+        else:
+            self.changes += 1
+            self.interval = self.min_interval
+            self.state_received.emit(state)
+        self.timer.start(self.interval)
+
+    def set_idle(self, idle):
+        # While nobody looks the source is still polled for the history, just rarely
+        self.max_interval = self.idle_interval if idle else self.active_interval
+        if not idle and self.timer.isActive():
+            self.timer.stop()
+            self.interval = self.min_interval
+            self.poll()
+
+    def stop(self):
+        self.stopped = True
+        self.timer.stop()
+        self.executor.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "polls": self.polls,
+            "changes": self.changes,
+            "interval": self.interval,
+        }
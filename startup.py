@@ -0,0 +1,24 @@
+import sys
+import time
+
+
+class StartupProfile:
+    def __init__(self, start=None):
+        self.start = self.last = start if start is not None else time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        # Time spent since the previous mark is booked on this phase
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self, file=sys.stderr):
+        width = max(len(phase) for phase, _ in self.phases)
+        print("startup profile:", file=file)
+        for phase, seconds in self.phases:
+            print(f"  {phase:<{width}}  {seconds * 1000:8.1f} ms", file=file)
+        print(f"  {'total':<{width}}  {self.total() * 1000:8.1f} ms", file=file)
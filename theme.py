@@ -0,0 +1,165 @@
+from functools import lru_cache
+from string import Template
+
+# Index in THEMES is the mode value used by the settings slider and the chart (0 light, 1 dark)
+THEMES = [
+    {
+        "name": "light",
+        "background": "#E0E0E0",
+        "foreground": "#000000",
+        "input_background": "#FFFFFF",
+        "button": "#4787BD",
+        "button_hover": "#3E76A6",
+        "button_pressed": "#36668F",
+        "groove": "#333333",
+        "handle": "#000000",
+        "handle_hover": "#333333",
+        "handle_pressed": "#555555",
+        "icons": "light",
+        "chart_edge": "black",
+    },
+    {
+        "name": "dark",
+        "background": "#333333",
+        "foreground": "#FFFFFF",
+        "input_background": "#222222",
+        "button": "#286090",
+        "button_hover": "#1A4D73",
+        "button_pressed": "#144057",
+        "groove": "#E0E0E0",
+        "handle": "#FFFFFF",
+        "handle_hover": "#DDDDDD",
+        "handle_pressed": "#BBBBBB",
+        "icons": "dark",
+        "chart_edge": "white",
+    },
+]
+
+LINE_EDIT = """
+    QLineEdit {
+        padding: 2px;
+        color: $foreground;
+        font-size: 15px;
+        border: 1px solid $foreground;
+        border-radius: 4px;
+        background-color: $input_background;
+        selection-color: yellow;
+        selection-background-color: blue;
+    }
+"""
+
+MAIN_WINDOW = Template("""
+    QMainWindow {
+        background-color: $background;
+    }
+    QLabel {
+        font-size: 15px;
+        color: $foreground;
+    }
+""" + LINE_EDIT + """
+    QPushButton {
+        border: 1px solid $foreground;
+        border-radius: 4px;
+    }
+    #settings, #mini, #main {
+        qproperty-icons: "$icons";
+    }
+""")
+
+SETTINGS_WINDOW = Template("""
+    QDialog {
+        background-color: $background;
+    }
+    QLabel {
+        font-size: 15px;
+        color: $foreground;
+    }
+""" + LINE_EDIT + """
+    QPushButton {
+        padding: 6px 12px;
+        font-size: 10px;
+        border: 1px solid $foreground;
+        border-radius: 4px;
+        background-color: $button;
+        color: $foreground;
+    }
+    QPushButton:hover {
+        background-color: $button_hover;
+    }
+    QPushButton:pressed {
+        background-color: $button_pressed;
+    }
+    QSlider {
+        background-color: transparent;
+        height: 30px;
+        padding: 0;
+    }
+    QSlider::groove:horizontal {
+        background-color: $groove;
+        height: 6px;
+        border-radius: 3px;
+    }
+    QSlider::handle:horizontal {
+        background-color: $handle;
+        width: 20px;
+        height: 20px;
+        margin: -7px 0;
+        border-radius: 10px;
+    }
+    QSlider::handle:horizontal:hover {
+        background-color: $handle_hover;
+    }
+    QSlider::handle:horizontal:pressed {
+        background-color: $handle_pressed;
+    }
+    QCheckBox {
+        spacing: 5px;
+    }
+    QCheckBox::indicator {
+        width: 20px;
+        height: 20px;
+    }
+    QCheckBox::indicator:unchecked {
+        image: url(:/images/checkbox_unchecked_$icons.png);
+    }
+    QCheckBox::indicator:unchecked:hover {
+        image: url(:/images/checkbox_unchecked_hover_$icons.png);
+    }
+    QCheckBox::indicator:unchecked:pressed {
+        image: url(:/images/checkbox_unchecked_pressed_$icons.png);
+    }
+    QCheckBox::indicator:checked {
+        image: url(:/images/checkbox_checked_$icons.png);
+    }
+    QCheckBox::indicator:checked:hover {
+        image: url(:/images/checkbox_checked_hover_$icons.png);
+    }
+    QCheckBox::indicator:checked:pressed {
+        image: url(:/images/checkbox_checked_pressed_$icons.png);
+    }
+""")
+
+
+def theme_index(mode):
+    # A pushed or parsed mode as an index into THEMES, unknown ones fall back to dark like theme() does
+    mode = int(mode)
+    return mode if 0 <= mode < len(THEMES) else 1
+
+
+def theme(mode):
+    # Unknown modes fall back to dark, the default of the main window
+    return THEMES[mode] if 0 <= mode < len(THEMES) else THEMES[1]
+
+
+@lru_cache(maxsize=None)
+def main_stylesheet(mode):
+    # The button icons are drawn by IconButton, the stylesheet only tells it which set to use
+    return MAIN_WINDOW.substitute(theme(mode))
+
+
+@lru_cache(maxsize=None)
+def settings_stylesheet(mode):
+    # The checkbox images come from the resource bundle, independent of the working directory
+    from resources import register
+    register()
+    return SETTINGS_WINDOW.substitute(theme(mode))
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QPainter
+from chart import pie_fractions
+from scheduler import ResizeGate
+from instrument import span
+
+
+class ThreadedChart(QWidget):
+    frame_ready = Signal(int, int, object)
+
+    def __init__(self, make_rasterizer, fast_resize=False, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # Two surfaces, the worker only ever draws into the one that is not on screen
+        self.surfaces = (make_rasterizer(), make_rasterizer())
+        self.front = 1
+        self.image = None
+
+        self.resize_gate = ResizeGate(self.request, parent=self) if fast_resize else None
+        self.state = None
+        self.seq = 0
+        self.busy = False
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pie-raster")
+
+        self.rendered = 0
+        self.discarded = 0
+
+        # Emitted from the worker, delivered on the GUI thread as a queued call
+        self.frame_ready.connect(self.swap)
+
+    def update_pie(self, done, tbd, color1, color2, mode, checkbox):
+        self.update_segments((done, tbd), (color1, color2), mode, checkbox)
+
+    def update_segments(self, values, colors, mode, checkbox):
+        self.state = (pie_fractions(*values), tuple(colors), mode, bool(checkbox))
+        self.request()
+
+    def request(self):
+        if self.state is None or self.width() <= 0 or self.height() <= 0:
+            return
+        self.seq += 1
+        if not self.busy:
+            self.start()
+
+    def start(self):
+        back = 1 - self.front
+        key = self.state + (self.width(), self.height(), self.devicePixelRatioF())
+        self.busy = True
+        self.executor.submit(self.render, back, self.seq, key)
+
+    def render(self, index, seq, key):
+        # Runs on the worker thread
+        with span("rasterize"):
+            image = self.surfaces[index](*key)
+        try:
+            self.frame_ready.emit(seq, index, image)
+        except RuntimeError:
+            # The widget went away while the frame was being drawn
+            pass
+
+    def swap(self, seq, index, image):
+        self.busy = False
+
+        # Newer input arrived while this frame was drawn, redraw the same back surface with it
+        if seq != self.seq:
+            self.discarded += 1
+            self.start()
+            return
+
+        self.front = index
+        self.image = image
+        self.rendered += 1
+        self.update()
+
+    def resizeEvent(self, event):
+        if self.resize_gate is not None and self.resize_gate.resized():
+            # Mid-drag the worker would only draw sizes that are already gone, stretch the last frame instead
+            self.update()
+            return
+        self.request()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+
+        with span("paint"):
+            painter = QPainter(self)
+            painter.drawImage(self.rect(), self.image)
+            painter.end()
+
+    def stats(self):
+        return {
+            "requested": self.seq,
+            "rendered": self.rendered,
+            "discarded": self.discarded,
+        }